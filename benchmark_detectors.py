@@ -0,0 +1,89 @@
+import os
+import time
+import argparse
+import cv2
+import numpy as np
+from imutils import paths
+import face_recognition
+import facial_recognition
+from face_detectors import BACKENDS, create_detector
+from benchmark_resolution import reference_encodings
+
+# Configuration
+DATASET_DIR = "dataset"     # Labeled stills: dataset/<name>/<image>
+DETECT_SCALES = [4, 8]      # Detection scales compared (cv_scaler values of facial_recognition.py)
+
+def run_backend(detector, images, names, references, detect_scale, encode_scale, upsample):
+    """Detect (and encode the largest face) on every image; return speed, recall and accuracy"""
+    detect_ms = []
+    detected = 0
+    extra = 0
+    correct = 0
+    for i, image in enumerate(images):
+        frame = image if encode_scale == 1 else cv2.resize(image, (0, 0), fx=1/encode_scale, fy=1/encode_scale)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        scale = max(1, detect_scale // encode_scale)
+
+        # Same steps as detect_faces: shrink, detect, map boxes back
+        t0 = time.perf_counter()
+        small = rgb if scale == 1 else cv2.resize(rgb, (0, 0), fx=1/scale, fy=1/scale)
+        boxes = [tuple(int(v * scale) for v in box) for box in detector.detect(small, upsample)]
+        detect_ms.append((time.perf_counter() - t0) * 1000)
+        if not boxes:
+            continue
+        # Each dataset image shows one person; more boxes are false positives
+        detected += 1
+        extra += len(boxes) - 1
+
+        # The boxes must work for encoding: match the largest face against the other images
+        box = max(boxes, key=lambda b: (b[2] - b[0]) * (b[1] - b[3]))
+        encoding = face_recognition.face_encodings(rgb, [box], model=facial_recognition.ENCODING_MODEL)[0]
+        others = [j for j, ref in enumerate(references) if j != i and ref is not None]
+        if not others:
+            continue
+        distances = np.linalg.norm(np.array([references[j] for j in others]) - encoding, axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] <= facial_recognition.RECOGNITION_TOLERANCE and names[others[best]] == names[i]:
+            correct += 1
+
+    return {
+        "detect_ms": float(np.mean(detect_ms)) if detect_ms else 0.0,
+        "detect_p95_ms": float(np.percentile(detect_ms, 95)) if detect_ms else 0.0,
+        "recall": detected / len(images),
+        "extra_per_image": extra / len(images),
+        "accuracy": correct / len(images),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare face detector backends for speed and recall")
+    parser.add_argument("--dataset", default=DATASET_DIR, help="folder of <name>/<image> files")
+    parser.add_argument("--detectors", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--scales", type=int, nargs="+", default=DETECT_SCALES, help="detection scales to compare")
+    parser.add_argument("--upsample", type=int, default=facial_recognition.DETECT_UPSAMPLE)
+    args = parser.parse_args()
+
+    image_paths = sorted(paths.list_images(args.dataset))
+    if not image_paths:
+        print(f"[ERROR] No images found in {args.dataset}")
+        return
+    names = [image_path.split(os.path.sep)[-2] for image_path in image_paths]
+    images = [cv2.imread(image_path) for image_path in image_paths]
+    print(f"[INFO] Encoding {len(image_paths)} reference images at full resolution...")
+    references = reference_encodings(image_paths)
+
+    for kind in args.detectors:
+        try:
+            detector = create_detector(kind)
+        except (FileNotFoundError, RuntimeError) as e:
+            print(f"[INFO] Skipping {kind}: {e}")
+            continue
+        detector.detect(np.zeros((120, 160, 3), dtype=np.uint8), 0)  # Load models before timing
+        for detect_scale in args.scales:
+            result = run_backend(detector, images, names, references, detect_scale,
+                                 facial_recognition.ENCODE_SCALE, args.upsample)
+            print(f"  {kind:<5} scale 1/{detect_scale:<2}  detect {result['detect_ms']:7.1f} ms "
+                  f"(p95 {result['detect_p95_ms']:6.1f})  recall {result['recall']:6.1%}  "
+                  f"extra {result['extra_per_image']:4.2f}/image  correct {result['accuracy']:6.1%}")
+
+if __name__ == "__main__":
+    main()
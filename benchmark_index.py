@@ -0,0 +1,67 @@
+import time
+import argparse
+import numpy as np
+from gallery import Gallery
+from gallery_index import build_index
+
+# Configuration
+SIZES = [1000, 10000, 100000]  # Number of synthetic identities
+SAMPLES_PER_PERSON = 2         # Gallery encodings per identity
+QUERIES = 300                  # Number of query faces per size
+FACES_PER_FRAME = 3            # Queries are matched in batches like MAX_FACES
+IDENTITY_SPREAD = 0.15         # Std-dev of identity centres per dimension
+SAMPLE_NOISE = 0.02            # Std-dev of per-image noise around an identity
+
+def synthetic_gallery(n_people, samples_per_person, rng):
+    """Create a gallery of random identities with a few noisy samples each"""
+    centres = rng.normal(0, IDENTITY_SPREAD, size=(n_people, 128)).astype(np.float32)
+    labels = np.repeat(np.arange(n_people, dtype=np.int32), samples_per_person)
+    encodings = centres[labels] + rng.normal(0, SAMPLE_NOISE, size=(len(labels), 128)).astype(np.float32)
+    names = [f"person{i}" for i in range(n_people)]
+    return Gallery(encodings, labels, names), centres
+
+def brute_force(encodings, queries):
+    """Reference matcher: the original per-face np.linalg.norm loop"""
+    return np.array([np.argmin(np.linalg.norm(encodings - query, axis=1)) for query in queries])
+
+def time_batches(search, queries):
+    """Run a search over batches of queries and return per-batch latencies in ms and the result rows"""
+    latencies = []
+    rows = []
+    for start in range(0, len(queries), FACES_PER_FRAME):
+        batch = queries[start:start + FACES_PER_FRAME]
+        t0 = time.perf_counter()
+        result = search(batch)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        rows.extend(result)
+    return np.array(latencies), np.array(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gallery search indexes on synthetic identities")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--samples", type=int, default=SAMPLES_PER_PERSON)
+    parser.add_argument("--queries", type=int, default=QUERIES)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for n_people in args.sizes:
+        gallery, centres = synthetic_gallery(n_people, args.samples, rng)
+        people = rng.integers(0, n_people, size=args.queries)
+        queries = centres[people] + rng.normal(0, SAMPLE_NOISE, size=(args.queries, 128)).astype(np.float32)
+
+        print(f"[INFO] {n_people} identities, {len(gallery)} encodings")
+        reference_ms, reference = time_batches(lambda batch: brute_force(gallery.encodings, batch), queries)
+        print(f"  brute force   p50 {np.percentile(reference_ms, 50):8.3f} ms  "
+              f"p95 {np.percentile(reference_ms, 95):8.3f} ms  recall 1.000")
+
+        for kind in ["exact", "cluster"]:
+            t0 = time.perf_counter()
+            index = build_index(gallery, kind)
+            build_s = time.perf_counter() - t0
+            latencies, rows = time_batches(lambda batch: index.search(batch)[0], queries)
+            recall = np.mean(gallery.labels[rows] == gallery.labels[reference])
+            print(f"  {kind:<13} p50 {np.percentile(latencies, 50):8.3f} ms  "
+                  f"p95 {np.percentile(latencies, 95):8.3f} ms  recall {recall:.3f}  (build {build_s:.2f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import cv2
+import numpy as np
+from imutils import paths
+
+# Keep stdout clean for the JSON report
+with contextlib.redirect_stdout(sys.stderr):
+    import facial_recognition
+
+# Configuration
+SOURCE = "dataset"   # Video file or folder of images replayed as camera frames
+MAX_FRAMES = 0       # Frames replayed from the source (0 = all)
+RECOGNIZE_EVERY = 1  # Run recognition on every nth frame, like SKIP_FRAMES
+PERCENTILES = [50, 90, 95, 99]
+STAGES = ["decode", "resize_convert", "detect", "encode", "match", "draw"]
+# Module settings that can be overridden with --set NAME=VALUE
+TUNABLE = ["cv_scaler", "ENCODE_SCALE", "MAX_FACES", "RECOGNITION_TOLERANCE", "ROI_FACE_SIZE",
+           "DETECTOR", "DETECT_UPSAMPLE", "ENCODING_MODEL", "ENCODING_CACHE"]
+
+class NullWriter:
+    """Check-in writer that discards images and log rows"""
+    def save_image(self, path, face, full_frame=None):
+        return True
+
+    def log(self, name, timestamp, image=None):
+        return True
+
+def stub_side_effects():
+    """Run the pipeline without GPIO, message boxes or check-in files"""
+    facial_recognition.gpio_available = False
+    facial_recognition.show_message_box = lambda name, is_authorized=False: None
+
+def read_frames(source, max_frames=MAX_FRAMES):
+    """Yield (frame, decode ms) from a video file or an image folder"""
+    count = 0
+    if os.path.isdir(source):
+        for image_path in sorted(paths.list_images(source)):
+            if max_frames and count >= max_frames:
+                break
+            t0 = time.perf_counter()
+            frame = cv2.imread(image_path)
+            decode_ms = (time.perf_counter() - t0) * 1000
+            if frame is not None:
+                count += 1
+                yield frame, decode_ms
+    else:
+        cap = cv2.VideoCapture(source)
+        try:
+            while not max_frames or count < max_frames:
+                t0 = time.perf_counter()
+                ret, frame = cap.read()
+                decode_ms = (time.perf_counter() - t0) * 1000
+                if not ret:
+                    break
+                count += 1
+                yield frame, decode_ms
+        finally:
+            cap.release()
+
+def summarize(values):
+    """Count, mean, max and percentiles of a list of milliseconds"""
+    if not values:
+        return {"count": 0}
+    data = np.array(values)
+    summary = {"count": len(values), "mean": float(data.mean()), "max": float(data.max())}
+    for p in PERCENTILES:
+        summary[f"p{p}"] = float(np.percentile(data, p))
+    return summary
+
+def apply_overrides(overrides):
+    """Set module settings from NAME=VALUE strings; return the effective configuration"""
+    for override in overrides:
+        name, _, value = override.partition("=")
+        if name not in TUNABLE:
+            raise SystemExit(f"[ERROR] Unknown setting '{name}', choose from {', '.join(TUNABLE)}")
+        current = getattr(facial_recognition, name)
+        if isinstance(current, bool):
+            value = value.lower() in ("1", "true", "yes", "on")
+        setattr(facial_recognition, name, type(current)(value))
+    return {name: getattr(facial_recognition, name) for name in TUNABLE}
+
+def run(source, max_frames=MAX_FRAMES, recognize_every=RECOGNIZE_EVERY):
+    """Replay a source through the recognition stages on this thread and time each stage"""
+    recognizer = facial_recognition.OptimizedFaceRecognition()
+    recognizer.writer = NullWriter()
+    encode_scale = facial_recognition.ENCODE_SCALE
+    detect_scale = max(1, facial_recognition.cv_scaler // encode_scale)
+
+    stages = {stage: [] for stage in STAGES}
+    cache = {"cache_hits": 0, "cache_misses": 0, "cache_saved": 0.0, "cache_lookup": 0.0}
+    frame_ms = []
+    frames = 0
+    recognitions = 0
+    faces = 0
+    start_time = time.perf_counter()
+    t_frame = start_time
+
+    for frame, decode_ms in read_frames(source, max_frames):
+        stages["decode"].append(decode_ms)
+        frames += 1
+        current_fps = recognizer.calculate_fps()
+
+        if (frames - 1) % recognize_every == 0:
+            t0 = time.perf_counter()
+            small_frame = frame
+            if encode_scale > 1:
+                small_frame = cv2.resize(frame, (0, 0), fx=1/encode_scale, fy=1/encode_scale)
+            rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+            stages["resize_convert"].append((time.perf_counter() - t0) * 1000)
+
+            timings = {}
+            locations, names, _ = recognizer.recognize_faces(
+                rgb_frame, scale=encode_scale, detect_scale=detect_scale, timings=timings)
+            for stage, ms in timings.items():
+                if stage in stages:
+                    stages[stage].append(ms)
+                elif stage.startswith("cache_"):
+                    cache[stage] += ms
+            recognizer.last_face_locations, recognizer.last_face_names = locations, names
+            recognizer.handle_recognitions(frame)
+            recognitions += 1
+            faces += len(locations)
+
+        t0 = time.perf_counter()
+        recognizer.draw_results(frame, recognizer.last_face_locations, recognizer.last_face_names, current_fps)
+        stages["draw"].append((time.perf_counter() - t0) * 1000)
+
+        now = time.perf_counter()
+        frame_ms.append((now - t_frame) * 1000)
+        t_frame = now
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "frames": frames,
+        "recognitions": recognitions,
+        "faces": faces,
+        "elapsed_s": elapsed,
+        "throughput_fps": frames / elapsed if elapsed else 0.0,
+        "recognitions_per_s": recognitions / elapsed if elapsed else 0.0,
+        "frame_ms": summarize(frame_ms),
+        "stages_ms": {stage: summarize(values) for stage, values in stages.items()},
+        "encoding_cache": {
+            "hits": cache["cache_hits"],
+            "misses": cache["cache_misses"],
+            "hit_rate": cache["cache_hits"] / max(cache["cache_hits"] + cache["cache_misses"], 1),
+            "saved_ms": cache["cache_saved"],
+            "lookup_ms": cache["cache_lookup"],
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a video or image folder through the recognition pipeline "
+                                                 "without camera, UI or GPIO and report stage latencies as JSON")
+    parser.add_argument("--source", default=SOURCE, help="video file or folder of images")
+    parser.add_argument("--max-frames", type=int, default=MAX_FRAMES, help="frames to replay (0 = all)")
+    parser.add_argument("--every", type=int, default=RECOGNIZE_EVERY, help="recognize every nth frame")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="NAME=VALUE",
+                        help=f"override a setting ({', '.join(TUNABLE)})")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"[ERROR] Source {args.source} not found", file=sys.stderr)
+        sys.exit(1)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        facial_recognition.init_runtime(storage=False, gpio=False)
+    stub_side_effects()
+    config = apply_overrides(args.overrides)
+    report = {
+        "source": args.source,
+        "recognize_every": max(1, args.every),
+        "config": config,
+        "index": facial_recognition.INDEX_KIND,
+        "gallery_size": len(facial_recognition.face_index),
+    }
+    report.update(run(args.source, args.max_frames, max(1, args.every)))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"[INFO] {report['frames']} frames at {report['throughput_fps']:.1f} fps, report saved to {args.output}")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import time
+import argparse
+import cv2
+from imutils import paths
+import facial_recognition
+from recognition_pool import RecognitionPool
+
+# Configuration
+SOURCE = "dataset"   # Video file or folder of images used as frames
+DURATION = 20        # Seconds measured per worker count
+FPS = 30             # Rate at which frames are offered to the pool, like a camera
+MAX_FRAMES = 200     # Frames loaded into memory from the source
+
+def load_frames(source, max_frames=MAX_FRAMES):
+    """Load frames from a video file or an image folder, prepared like process_video does"""
+    frames = []
+    if os.path.isdir(source):
+        for image_path in sorted(paths.list_images(source))[:max_frames]:
+            frame = cv2.imread(image_path)
+            if frame is not None:
+                frames.append(frame)
+    else:
+        cap = cv2.VideoCapture(source)
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+
+    scale = 1 / facial_recognition.ENCODE_SCALE
+    return [cv2.cvtColor(cv2.resize(frame, (0, 0), fx=scale, fy=scale), cv2.COLOR_BGR2RGB)
+            for frame in frames]
+
+def measure(recognizer, frames, workers, duration, fps):
+    """Feed frames at a camera-like rate for a fixed time and return results per second"""
+    slot_bytes = max(frame.nbytes for frame in frames)
+    pool = RecognitionPool(recognizer.recognize_faces, workers, slot_bytes, warmup=facial_recognition.warm_up)
+    pool.start()
+    meta = {
+        "scale": facial_recognition.ENCODE_SCALE,
+        "detect_scale": max(1, facial_recognition.cv_scaler // facial_recognition.ENCODE_SCALE),
+    }
+
+    # Warm up every worker before timing
+    for seq in range(1, workers + 1):
+        pool.submit(seq, frames[seq % len(frames)], meta)
+        time.sleep(0.05)
+    fresh = 0
+    deadline = time.time() + 60
+    while fresh + pool.stale < 1 and time.time() < deadline:
+        fresh += len(pool.get_results())
+        time.sleep(0.01)
+
+    seq = workers
+    results = 0
+    stale_before = pool.stale
+    start_time = time.time()
+    next_frame = start_time
+    while time.time() - start_time < duration:
+        seq += 1
+        pool.submit(seq, frames[seq % len(frames)], meta)
+        results += len(pool.get_results())
+        next_frame += 1 / fps
+        time.sleep(max(0, next_frame - time.time()))
+    elapsed = time.time() - start_time
+
+    # Stale results are still finished work
+    results += pool.stale - stale_before
+    pool.stop()
+    return results / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recognition throughput for 1-4 workers")
+    parser.add_argument("--source", default=SOURCE, help="video file or image folder")
+    parser.add_argument("--duration", type=float, default=DURATION)
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--fps", type=float, default=FPS, help="rate at which frames are offered")
+    args = parser.parse_args()
+
+    frames = load_frames(args.source)
+    if not frames:
+        print(f"[ERROR] No frames found in {args.source}")
+        return
+
+    facial_recognition.init_runtime(storage=False, gpio=False)
+    recognizer = facial_recognition.OptimizedFaceRecognition()
+    print(f"[INFO] {len(frames)} frames from {args.source}, {args.duration:.0f}s per run")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        rate = measure(recognizer, frames, workers, args.duration, args.fps)
+        baseline = baseline or rate
+        print(f"  {workers} worker(s): {rate:6.2f} results/s  (x{rate / baseline:.2f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+import time
+import argparse
+import cv2
+import numpy as np
+from imutils import paths
+import face_recognition
+import facial_recognition
+
+# Configuration
+DATASET_DIR = "dataset"
+# (label, detection scale, encoding scale), both relative to the original frame
+CONFIGS = [
+    ("scale 8", 8, 8),
+    ("scale 2", 2, 2),
+    ("detect 8 / encode 2", 8, 2),
+]
+SHRINK_FACTORS = [1, 2, 3]  # Extra downscaling of each image to simulate a face further away
+
+def reference_encodings(image_paths, model="large"):
+    """Encode every image at full resolution, like model_training.py does (with its default model)"""
+    references = []
+    for image_path in image_paths:
+        rgb = cv2.cvtColor(cv2.imread(image_path), cv2.COLOR_BGR2RGB)
+        boxes = face_recognition.face_locations(rgb, model="hog")
+        encodings = face_recognition.face_encodings(rgb, boxes, model=model)
+        references.append(encodings[0] if encodings else None)
+    return references
+
+def run_config(recognizer, images, names, references, detect_scale, encode_scale):
+    """Detect and encode every image with one configuration; return timing and accuracy figures"""
+    detect_ms = []
+    encode_ms = []
+    detected = 0
+    correct = 0
+    for i, image in enumerate(images):
+        frame = image if encode_scale == 1 else cv2.resize(image, (0, 0), fx=1/encode_scale, fy=1/encode_scale)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+        t0 = time.perf_counter()
+        boxes = recognizer.detect_faces(rgb, max(1, detect_scale // encode_scale))
+        detect_ms.append((time.perf_counter() - t0) * 1000)
+        if not boxes:
+            continue
+        detected += 1
+
+        # Encode the largest face, the one the photo was taken of
+        box = max(boxes, key=lambda b: (b[2] - b[0]) * (b[1] - b[3]))
+        t0 = time.perf_counter()
+        encoding = face_recognition.face_encodings(rgb, [box], model="small")[0]
+        encode_ms.append((time.perf_counter() - t0) * 1000)
+
+        # Leave-one-out match against the full-resolution encodings of the other images
+        others = [j for j, ref in enumerate(references) if j != i and ref is not None]
+        if not others:
+            continue
+        distances = np.linalg.norm(np.array([references[j] for j in others]) - encoding, axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] <= facial_recognition.RECOGNITION_TOLERANCE and names[others[best]] == names[i]:
+            correct += 1
+
+    return {
+        "detect_ms": float(np.mean(detect_ms)) if detect_ms else 0.0,
+        "encode_ms": float(np.mean(encode_ms)) if encode_ms else 0.0,
+        "detection_rate": detected / len(images),
+        "accuracy": correct / len(images),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-scale and detect-low/encode-high pipelines")
+    parser.add_argument("--dataset", default=DATASET_DIR, help="folder of <name>/<image> files")
+    parser.add_argument("--shrink", type=float, nargs="+", default=SHRINK_FACTORS,
+                        help="extra downscaling factors that simulate greater distance")
+    args = parser.parse_args()
+
+    image_paths = sorted(paths.list_images(args.dataset))
+    if not image_paths:
+        print(f"[ERROR] No images found in {args.dataset}")
+        return
+    names = [image_path.split(os.path.sep)[-2] for image_path in image_paths]
+    print(f"[INFO] Encoding {len(image_paths)} reference images at full resolution...")
+    references = reference_encodings(image_paths)
+
+    recognizer = facial_recognition.OptimizedFaceRecognition()
+    for shrink in args.shrink:
+        images = []
+        for image_path in image_paths:
+            image = cv2.imread(image_path)
+            if shrink != 1:
+                image = cv2.resize(image, (0, 0), fx=1/shrink, fy=1/shrink, interpolation=cv2.INTER_AREA)
+            images.append(image)
+
+        print(f"[INFO] Distance factor x{shrink:g}")
+        for label, detect_scale, encode_scale in CONFIGS:
+            result = run_config(recognizer, images, names, references, detect_scale, encode_scale)
+            print(f"  {label:<20} detect {result['detect_ms']:7.1f} ms  encode {result['encode_ms']:6.1f} ms  "
+                  f"detected {result['detection_rate']:6.1%}  correct {result['accuracy']:6.1%}")
+
+if __name__ == "__main__":
+    main()
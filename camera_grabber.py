@@ -0,0 +1,185 @@
+import os
+import time
+import threading
+import cv2
+
+# Configuration
+INITIAL_BACKOFF = 0.5  # Seconds before the first reconnect attempt
+MAX_BACKOFF = 10.0     # Upper limit of the exponential reconnect backoff
+CAPTURE_FPS = 30       # Requested frame rate of live cameras
+CAPTURE_WIDTH = 400    # Requested resolution of live cameras (lower = faster)
+CAPTURE_HEIGHT = 300
+
+def parse_source(source):
+    """Turn a camera setting into a VideoCapture argument: device index, URL or file path"""
+    if isinstance(source, str) and source.strip().isdigit():
+        return int(source)
+    return source
+
+def is_file_source(source):
+    """Check whether a source is a local video file rather than a live stream"""
+    return isinstance(source, str) and os.path.isfile(source)
+
+class CameraGrabber:
+    """Read a camera on its own thread and keep only the newest frame
+
+    Live streams are drained as fast as they deliver, so the consumer always gets the most
+    recent frame. Local video files are played at their native frame rate (realtime) or
+    one frame per read (not realtime), so the pipeline can be tested without a camera.
+    """
+    def __init__(self, sources, realtime=True, loop=False):
+        self.sources = list(sources) if isinstance(sources, (list, tuple)) else [sources]
+        self.realtime = realtime
+        self.loop = loop
+        self.cond = threading.Condition()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Newest frame
+        self.frame = None
+        self.seq = 0
+        self.timestamp = 0
+        self.read_seq = 0
+
+        # Statistics
+        self.source = None
+        self.connected = False
+        self.finished = False  # Capture thread exited (stopped or end of file)
+        self.ended = False     # A video file reached its end
+        self.frames = 0
+        self.dropped = 0      # Frames replaced before the consumer read them
+        self.reconnects = 0   # Reconnect attempts after a failure
+
+    def start(self):
+        """Start the capture thread"""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="camera-grabber", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=2):
+        """Stop the capture thread and release the camera"""
+        self.stop_event.set()
+        with self.cond:
+            self.cond.notify_all()
+        thread, self.thread = self.thread, None  # stop() may also run from the processing thread's cleanup
+        if thread:
+            thread.join(timeout=timeout)
+
+    def wait_connected(self, timeout):
+        """Block until the first frame arrives; return False on timeout or if the source ended"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq > 0 or self.finished, timeout)
+            return self.seq > 0
+
+    def read(self, timeout=None):
+        """Wait for a frame newer than the last one read; return (seq, frame, timestamp) or None"""
+        with self.cond:
+            self.cond.wait_for(
+                lambda: self.seq > self.read_seq or self.finished or self.stop_event.is_set(),
+                timeout
+            )
+            if self.seq <= self.read_seq:
+                return None
+            self.read_seq = self.seq
+            self.cond.notify_all()
+            return self.seq, self.frame, self.timestamp
+
+    def open_capture(self):
+        """Open the first source that works, with low-latency settings for live streams"""
+        for source in self.sources:
+            print(f"[INFO] Attempting to connect to camera at {source}")
+            cap = cv2.VideoCapture(parse_source(source))
+            if cap.isOpened():
+                if not is_file_source(source):
+                    # Optimize camera settings for performance
+                    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer size
+                    cap.set(cv2.CAP_PROP_FPS, CAPTURE_FPS)
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAPTURE_WIDTH)
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAPTURE_HEIGHT)
+                self.source = source
+                print("[INFO] Camera connected successfully")
+                return cap
+            cap.release()
+        print("[ERROR] Cannot connect to any camera")
+        return None
+
+    def publish(self, frame):
+        """Replace the newest frame and wake the consumer"""
+        with self.cond:
+            if self.seq > self.read_seq:
+                self.dropped += 1
+            self.frame = frame
+            self.seq += 1
+            self.frames += 1
+            self.timestamp = time.time()
+            self.connected = True
+            self.cond.notify_all()
+
+    def run(self):
+        """Capture loop with exponential reconnect backoff"""
+        backoff = INITIAL_BACKOFF
+        cap = None
+        file_source = False
+        frame_interval = 0
+        next_frame_time = 0
+
+        while not self.stop_event.is_set():
+            if cap is None:
+                cap = self.open_capture()
+                if cap is None:
+                    self.reconnects += 1
+                    self.stop_event.wait(backoff)
+                    backoff = min(backoff * 2, MAX_BACKOFF)
+                    continue
+                file_source = is_file_source(self.source)
+                fps = cap.get(cv2.CAP_PROP_FPS) if file_source else 0
+                frame_interval = 1.0 / fps if file_source and self.realtime and fps > 0 else 0
+                next_frame_time = time.time()
+
+            ret, frame = cap.read()
+            if not ret:
+                if file_source:
+                    if self.loop:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    self.ended = True
+                    break
+
+                print(f"[ERROR] Failed to read frame. Reconnecting in {backoff:.1f}s...")
+                cap.release()
+                cap = None
+                with self.cond:
+                    self.connected = False
+                self.reconnects += 1
+                self.stop_event.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                continue
+
+            backoff = INITIAL_BACKOFF
+            self.publish(frame)
+
+            if file_source:
+                if frame_interval:
+                    # Play the file at its recorded frame rate
+                    next_frame_time += frame_interval
+                    self.stop_event.wait(max(0, next_frame_time - time.time()))
+                elif not self.realtime:
+                    # Hand over every frame: wait until the consumer has read this one
+                    with self.cond:
+                        self.cond.wait_for(lambda: self.read_seq >= self.seq or self.stop_event.is_set())
+
+        if cap is not None:
+            cap.release()
+        with self.cond:
+            self.connected = False
+            self.finished = True
+            self.cond.notify_all()
+
+    def stats(self):
+        """Capture counters for reporting"""
+        return {
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+            "connected": self.connected,
+        }
@@ -0,0 +1,167 @@
+import os
+import time
+import argparse
+import cv2
+from checkin_store import CheckinStore, DB_FILE
+
+# Configuration
+IMG_FOLDER = "checkin_images"
+THUMB_SIZE = 160            # Longest side of the saved face crop in pixels
+THUMB_MARGIN = 0.3          # Space kept around the face box, as a fraction of its size on each side
+THUMB_QUALITY = 80          # JPEG quality of face crops
+SAVE_FULL_FRAME = False     # Also keep the whole frame next to each face crop
+FULL_FRAME_QUALITY = 75     # JPEG quality of full frames
+MAX_STORE_BYTES = 200 * 1024 * 1024  # Oldest images are removed beyond this total size
+MAX_AGE_DAYS = 90           # Images older than this are removed (0 = keep regardless of age)
+PRUNE_TARGET = 0.9          # When over the size limit, remove down to this share of it
+AGE_CHECK_INTERVAL = 3600   # Seconds between checks for images past MAX_AGE_DAYS
+EVICT_BATCH = 200           # Images removed per query while pruning
+
+def image_path(name, when, camera_id=None, root=IMG_FOLDER):
+    """Path of a check-in image: one folder per day, named after the person, time and camera"""
+    camera = f"_{camera_id}" if camera_id else ""
+    return os.path.join(root, when.strftime("%Y-%m-%d"), f"{name}_{when.strftime('%H%M%S')}{camera}.jpg")
+
+def full_frame_path(path):
+    base, ext = os.path.splitext(path)
+    return f"{base}_full{ext}"
+
+def face_crop(frame, box, margin=THUMB_MARGIN):
+    """Copy of the face region (top, right, bottom, left) of a frame with a margin, or the whole frame"""
+    if box is None:
+        return frame.copy()
+    top, right, bottom, left = box
+    dy = int((bottom - top) * margin)
+    dx = int((right - left) * margin)
+    height, width = frame.shape[:2]
+    crop = frame[max(0, top - dy):min(height, bottom + dy), max(0, left - dx):min(width, right + dx)]
+    return crop.copy() if crop.size else frame.copy()
+
+def encode_jpeg(image, quality, max_side=None):
+    """JPEG bytes of an image, shrunk so its longest side is at most max_side"""
+    if max_side:
+        scale = max_side / max(image.shape[:2])
+        if scale < 1:
+            image = cv2.resize(image, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buffer.tobytes()
+
+class CheckinImageStore:
+    """Check-in images in per-day folders, indexed in the check-in database, with retention
+
+    Every saved file is recorded in the images table with its size and time, so the total
+    size and the oldest files are known without listing folders. Beyond MAX_STORE_BYTES or
+    MAX_AGE_DAYS the oldest files are deleted and the check-ins that pointed at them keep
+    their row with no image. Use it from one thread, with that thread's CheckinStore.
+    """
+    def __init__(self, store, root=IMG_FOLDER, max_bytes=MAX_STORE_BYTES, max_age_days=MAX_AGE_DAYS):
+        self.store = store
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.total_bytes = store.image_bytes()
+        self.last_age_check = 0
+        self.bytes_written = 0
+        self.evicted = 0
+
+    def save(self, path, face, full_frame=None, now=None):
+        """Write a face crop (and optionally the full frame) and index it; return bytes written"""
+        now = time.time() if now is None else now
+        files = [(path, encode_jpeg(face, THUMB_QUALITY, THUMB_SIZE))]
+        if full_frame is not None:
+            files.append((full_frame_path(path), encode_jpeg(full_frame, FULL_FRAME_QUALITY)))
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        written = 0
+        for file_path, data in files:
+            with open(file_path, "wb") as f:
+                f.write(data)
+            written += len(data)
+        self.store.add_images([(file_path, len(data), now) for file_path, data in files])
+        self.total_bytes += written
+        self.bytes_written += written
+        self.enforce(now)
+        return written
+
+    def enforce(self, now=None):
+        """Remove the oldest images beyond the size limit and, at most hourly, those past the age limit"""
+        now = time.time() if now is None else now
+        if self.max_bytes and self.total_bytes > self.max_bytes:
+            target = self.max_bytes * PRUNE_TARGET
+            while self.total_bytes > target:
+                if not self.evict(self.store.oldest_images(EVICT_BATCH), target):
+                    break
+        if self.max_age_days and now - self.last_age_check >= AGE_CHECK_INTERVAL:
+            self.last_age_check = now
+            cutoff = now - self.max_age_days * 86400
+            while self.evict(self.store.oldest_images(EVICT_BATCH, before=cutoff)):
+                pass
+
+    def evict(self, images, target=None):
+        """Delete (path, bytes) images oldest first, stopping once total_bytes <= target; return the count"""
+        removed = []
+        for path, size in images:
+            if target is not None and self.total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"[ERROR] Cannot remove check-in image {path}: {e}")
+                continue
+            removed.append(path)
+            self.total_bytes -= size
+            folder = os.path.dirname(path)
+            if folder != self.root and os.path.isdir(folder) and not os.listdir(folder):
+                os.rmdir(folder)  # Last image of that day
+        if removed:
+            self.store.remove_images(removed)
+            self.evicted += len(removed)
+        return len(removed)
+
+    def index_existing(self):
+        """Add images saved before the store existed (flat checkin_images/ files) to the index"""
+        indexed = self.store.indexed_images()
+        rows = []
+        for folder, _, files in os.walk(self.root):
+            for filename in files:
+                path = os.path.join(folder, filename)
+                if filename.lower().endswith(".jpg") and path not in indexed:
+                    stat = os.stat(path)
+                    rows.append((path, stat.st_size, stat.st_mtime))
+        self.store.add_images(rows)
+        self.total_bytes = self.store.image_bytes()
+        return len(rows)
+
+    def stats(self):
+        return {
+            "total_bytes": self.total_bytes,
+            "bytes_written": self.bytes_written,
+            "evicted": self.evicted,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune the check-in image store")
+    parser.add_argument("command", choices=["stats", "index", "prune"],
+                        help="stats: size and count; index: add existing image files; prune: apply retention now")
+    parser.add_argument("--max-mb", type=float, default=MAX_STORE_BYTES / 1024 / 1024)
+    parser.add_argument("--max-age-days", type=float, default=MAX_AGE_DAYS)
+    args = parser.parse_args()
+
+    store = CheckinStore(DB_FILE)
+    images = CheckinImageStore(store, max_bytes=int(args.max_mb * 1024 * 1024), max_age_days=args.max_age_days)
+    if args.command == "index":
+        print(f"[INFO] Indexed {images.index_existing()} existing images")
+    elif args.command == "prune":
+        images.enforce()
+        print(f"[INFO] Removed {images.evicted} images")
+    count = len(store.indexed_images())
+    print(f"[INFO] {count} images, {images.total_bytes / 1024 / 1024:.1f} MB "
+          f"(limit {images.max_bytes / 1024 / 1024:.0f} MB, {images.max_age_days:g} days)")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import os
+import csv
+import sqlite3
+
+# Configuration
+DB_FILE = "checkins.db"
+PAGE_SIZE = 200      # Rows returned per query page
+COUNT_LIMIT = 10000  # Matching rows are counted up to this limit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkins (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    image TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_checkins_name_timestamp ON checkins (name, timestamp);
+CREATE INDEX IF NOT EXISTS idx_checkins_timestamp ON checkins (timestamp);
+CREATE INDEX IF NOT EXISTS idx_checkins_image ON checkins (image);
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_images_created ON images (created);
+CREATE TABLE IF NOT EXISTS people (name TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+def prefix_range(prefix):
+    """Bounds that select every string starting with prefix through an index range scan"""
+    return prefix, prefix + "\U0010ffff"
+
+class CheckinStore:
+    """Check-in history in SQLite (WAL mode), indexed by name and timestamp
+
+    Each thread must use its own CheckinStore: the recognition writer and the UI open
+    separate connections and WAL lets them read and write concurrently.
+    """
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def add_checkins(self, rows):
+        """Insert (name, timestamp, image) rows in one transaction"""
+        with self.conn:
+            self.insert_checkins(rows)
+
+    def insert_checkins(self, rows):
+        """Insert (name, timestamp, image) rows in the current transaction"""
+        rows = list(rows)
+        self.conn.executemany("INSERT INTO checkins (name, timestamp, image) VALUES (?, ?, ?)", rows)
+        self.conn.executemany("INSERT OR IGNORE INTO people (name) VALUES (?)",
+                              {(name,) for name, _, _ in rows})
+
+    def import_csv(self, csv_path):
+        """Import an existing checkin_log.csv once; later calls do nothing
+
+        The check, the rows and the marker commit as one write transaction, so the log is
+        imported exactly once even if another connection tries at the same time or the
+        import is interrupted.
+        """
+        marker = "SELECT 1 FROM meta WHERE key = 'csv_imported'"
+        if self.conn.execute(marker).fetchone():
+            return 0
+        count = 0
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.conn.execute(marker).fetchone():  # Imported while we waited for the lock
+                self.conn.rollback()
+                return 0
+            if os.path.exists(csv_path):
+                with open(csv_path, "r", newline="") as file:
+                    reader = csv.reader(file)
+                    next(reader, None)  # Skip header
+                    batch = []
+                    for row in reader:
+                        if len(row) >= 2:
+                            batch.append((row[0], row[1], None))
+                        if len(batch) >= 10000:
+                            self.insert_checkins(batch)
+                            count += len(batch)
+                            batch = []
+                    self.insert_checkins(batch)
+                    count += len(batch)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('csv_imported', ?)", (csv_path,))
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        if count:
+            print(f"[INFO] Imported {count} check-ins from '{csv_path}'")
+        return count
+
+    def matching_names(self, name_filter):
+        """People whose name contains the filter text (case-insensitive)
+
+        Filtered in Python: SQLite's lower() only folds ASCII, so 'đức' would miss 'ĐứcAnh'.
+        The people table has one row per person, so this stays cheap.
+        """
+        needle = name_filter.casefold()
+        rows = self.conn.execute("SELECT name FROM people")
+        return [name for (name,) in rows if needle in name.casefold()]
+
+    def build_filter(self, name_filter=None, date_prefix=None):
+        """WHERE clause and parameters for a name/date filter, or None if nothing can match"""
+        clauses = []
+        params = []
+        if name_filter:
+            names = self.matching_names(name_filter)
+            if not names:
+                return None
+            clauses.append(f"name IN ({', '.join('?' * len(names))})")
+            params.extend(names)
+        if date_prefix:
+            clauses.append("timestamp >= ? AND timestamp < ?")
+            params.extend(prefix_range(date_prefix))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def query(self, name_filter=None, date_prefix=None, limit=PAGE_SIZE, before=None, after=None):
+        """Matching check-ins as (id, name, timestamp, image) rows, newest first
+
+        Pass the (timestamp, id) of the last row of a page as `before` to get the next (older)
+        page, or of the first row as `after` to get the newer rows just above it; those are
+        returned oldest first.
+        """
+        built = self.build_filter(name_filter, date_prefix)
+        if built is None:
+            return []
+        where, params = built
+        order = "DESC"
+        if before is not None:
+            where += (" AND " if where else "WHERE ") + "(timestamp < ? OR (timestamp = ? AND id < ?))"
+            params += [before[0], before[0], before[1]]
+        elif after is not None:
+            where += (" AND " if where else "WHERE ") + "(timestamp > ? OR (timestamp = ? AND id > ?))"
+            params += [after[0], after[0], after[1]]
+            order = "ASC"
+        sql = (f"SELECT id, name, timestamp, image FROM checkins {where} "
+               f"ORDER BY timestamp {order}, id {order} LIMIT ?")
+        return self.conn.execute(sql, params + [limit]).fetchall()
+
+    def query_since(self, last_id, name_filter=None, date_prefix=None, limit=PAGE_SIZE):
+        """Matching check-ins added after row last_id, oldest first"""
+        built = self.build_filter(name_filter, date_prefix)
+        if built is None:
+            return []
+        where, params = built
+        where += (" AND " if where else "WHERE ") + "id > ?"
+        sql = f"SELECT id, name, timestamp, image FROM checkins {where} ORDER BY id LIMIT ?"
+        return self.conn.execute(sql, params + [last_id, limit]).fetchall()
+
+    def last_id(self):
+        """Id of the newest row, or 0 if the store is empty"""
+        return self.conn.execute("SELECT MAX(id) FROM checkins").fetchone()[0] or 0
+
+    def add_images(self, rows):
+        """Record saved image files as (path, bytes, created) rows"""
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO images (path, bytes, created) VALUES (?, ?, ?)", rows)
+
+    def image_bytes(self):
+        """Total size of the indexed image files"""
+        return self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM images").fetchone()[0]
+
+    def oldest_images(self, limit, before=None):
+        """(path, bytes) of the oldest indexed images, optionally only those created before a time"""
+        if before is None:
+            sql, params = "SELECT path, bytes FROM images ORDER BY created LIMIT ?", [limit]
+        else:
+            sql, params = "SELECT path, bytes FROM images WHERE created < ? ORDER BY created LIMIT ?", [before, limit]
+        return self.conn.execute(sql, params).fetchall()
+
+    def indexed_images(self):
+        return {row[0] for row in self.conn.execute("SELECT path FROM images")}
+
+    def remove_images(self, paths):
+        """Drop images from the index; check-ins that linked to them keep their row without an image"""
+        rows = [(path,) for path in paths]
+        with self.conn:
+            self.conn.executemany("DELETE FROM images WHERE path = ?", rows)
+            self.conn.executemany("UPDATE checkins SET image = NULL WHERE image = ?", rows)
+
+    def count(self, name_filter=None, date_prefix=None, limit=COUNT_LIMIT):
+        """Number of matching check-ins, counted up to limit"""
+        built = self.build_filter(name_filter, date_prefix)
+        if built is None:
+            return 0
+        where, params = built
+        sql = f"SELECT COUNT(*) FROM (SELECT 1 FROM checkins {where} LIMIT ?)"
+        return self.conn.execute(sql, params + [limit]).fetchone()[0]
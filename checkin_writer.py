@@ -0,0 +1,163 @@
+import os
+import csv
+import time
+import queue
+import threading
+from checkin_store import CheckinStore, DB_FILE
+from checkin_image_store import CheckinImageStore, IMG_FOLDER
+
+# Configuration
+WRITER_QUEUE_SIZE = 64   # Pending images and log rows before new images are dropped
+LOG_BATCH_SIZE = 20      # Log rows written together
+FLUSH_INTERVAL = 1.0     # Seconds before a partial batch of log rows is written
+FSYNC_INTERVAL = 5.0     # Seconds between fsyncs of the log file (0 = after every batch)
+LOG_PUT_TIMEOUT = 0.5    # Seconds a log row may wait for queue space before it is dropped
+
+class CheckinWriter:
+    """Single background thread that writes check-in images and log rows
+
+    Images are JPEG-encoded on the writer thread and kept by a CheckinImageStore (per-day
+    folders, size and age retention). Log rows are inserted in batches into the SQLite
+    check-in store and mirrored to a CSV file that stays open; fsync of the CSV runs at a
+    controlled interval instead of per row.
+    """
+    def __init__(self, log_file, db_file=DB_FILE, queue_size=WRITER_QUEUE_SIZE, image_root=IMG_FOLDER):
+        self.log_file = log_file
+        self.db_file = db_file
+        self.image_root = image_root
+        self.store = None
+        self.images = None
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.pending_rows = []
+        self.last_flush = time.time()
+        self.last_fsync = time.time()
+        self.file = None
+        self.csv_writer = None
+
+        # Statistics
+        self.images_written = 0
+        self.image_bytes = 0
+        self.rows_written = 0
+        self.dropped = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_count = 0
+
+    def start(self):
+        """Open the log file and start the writer thread"""
+        new_file = not os.path.exists(self.log_file)
+        self.file = open(self.log_file, mode="a", newline="")
+        self.csv_writer = csv.writer(self.file)
+        if new_file:
+            self.csv_writer.writerow(["Name", "Timestamp"])
+        self.thread = threading.Thread(target=self.run, name="checkin-writer", daemon=True)
+        self.thread.start()
+
+    def save_image(self, path, face, full_frame=None):
+        """Queue a face crop (and optionally the full frame) to be JPEG-encoded and saved; dropped if the queue is full
+        
+        The images must not be modified afterwards; pass copies.
+        """
+        try:
+            self.queue.put_nowait(("image", time.time(), path, face, full_frame))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            print(f"[ERROR] Writer queue full, dropping image {path}")
+            return False
+
+    def log(self, name, timestamp, image=None):
+        """Queue a check-in log row, optionally linked to its saved image"""
+        try:
+            self.queue.put(("row", time.time(), name, timestamp, image), timeout=LOG_PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            print(f"[ERROR] Writer queue full, dropping check-in of {name} at {timestamp}")
+            return False
+
+    def stop(self, timeout=5):
+        """Write everything still queued, fsync and close the log file"""
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join(timeout=timeout)
+            self.thread = None
+
+    def run(self):
+        """Writer loop"""
+        # SQLite connections belong to the thread that opened them
+        self.store = CheckinStore(self.db_file)
+        self.store.import_csv(self.log_file)
+        self.images = CheckinImageStore(self.store, self.image_root)
+        while True:
+            timeout = max(0.0, FLUSH_INTERVAL - (time.time() - self.last_flush)) if self.pending_rows else None
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+
+            if item is None:
+                break
+            if item and item[0] == "image":
+                _, queued_at, path, face, full_frame = item
+                self.write_image(path, face, full_frame)
+                self.record_latency(queued_at)
+            elif item:
+                _, queued_at, name, timestamp, image = item
+                self.pending_rows.append((queued_at, name, timestamp, image))
+
+            if len(self.pending_rows) >= LOG_BATCH_SIZE or (
+                    self.pending_rows and time.time() - self.last_flush >= FLUSH_INTERVAL):
+                self.flush_rows()
+
+        self.flush_rows(force_fsync=True)
+        self.file.close()
+        self.store.close()
+
+    def write_image(self, path, face, full_frame=None):
+        """Save a check-in image through the image store, which also applies retention"""
+        try:
+            self.image_bytes += self.images.save(path, face, full_frame)
+            self.images_written += 1
+        except Exception as e:
+            print(f"Error saving check-in image {path}: {e}")
+
+    def flush_rows(self, force_fsync=False):
+        """Append pending log rows and fsync if it is due"""
+        try:
+            if self.pending_rows:
+                self.store.add_checkins([(name, timestamp, image) for _, name, timestamp, image in self.pending_rows])
+                self.csv_writer.writerows([(name, timestamp) for _, name, timestamp, _ in self.pending_rows])
+                self.file.flush()
+            now = time.time()
+            if force_fsync or now - self.last_fsync >= FSYNC_INTERVAL:
+                os.fsync(self.file.fileno())
+                self.last_fsync = now
+            for queued_at, _, _, _ in self.pending_rows:
+                self.record_latency(queued_at)
+            self.rows_written += len(self.pending_rows)
+        except Exception as e:
+            print(f"Error logging check-in: {e}")
+        self.pending_rows = []
+        self.last_flush = time.time()
+
+    def record_latency(self, queued_at):
+        """Track time from queueing to write"""
+        latency = time.time() - queued_at
+        self.latency_total += latency
+        self.latency_count += 1
+        self.latency_max = max(self.latency_max, latency)
+
+    def stats(self):
+        """Queue depth and write latency for reporting"""
+        return {
+            "queue_depth": self.queue.qsize(),
+            "images_written": self.images_written,
+            "image_bytes": self.image_bytes,
+            "images_evicted": self.images.evicted if self.images else 0,
+            "rows_written": self.rows_written,
+            "dropped": self.dropped,
+            "latency_avg": self.latency_total / self.latency_count if self.latency_count else 0.0,
+            "latency_max": self.latency_max,
+        }
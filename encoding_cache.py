@@ -0,0 +1,118 @@
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+# Configuration
+CACHE_CAPACITY = 128     # Face crops remembered per recognition process
+CACHE_MAX_AGE = 10.0     # Seconds a cached encoding may be reused
+HASH_SIZE = 16           # dHash grid: HASH_SIZE x HASH_SIZE bits per face crop
+MAX_HASH_DISTANCE = 12   # Differing bits (of HASH_SIZE ** 2) for two crops to count as the same face
+HASH_TRIM = 0.1          # Fraction of the box trimmed on each side before hashing (ignores background)
+
+def crop_hash(rgb, box, hash_size=HASH_SIZE, trim=HASH_TRIM):
+    """Difference hash of a face crop as an int
+
+    The crop is reduced to a (hash_size, hash_size + 1) gray thumbnail and each bit records
+    whether a pixel is brighter than its right neighbour. Small shifts, scale changes,
+    noise and compression leave most bits unchanged; a different face changes many.
+    """
+    top, right, bottom, left = box
+    dy = int((bottom - top) * trim)
+    dx = int((right - left) * trim)
+    height, width = rgb.shape[:2]
+    crop = rgb[max(0, top + dy):min(height, bottom - dy), max(0, left + dx):min(width, right - dx)]
+    if crop.size == 0:
+        return None
+    gray = cv2.cvtColor(np.ascontiguousarray(crop), cv2.COLOR_RGB2GRAY)
+    thumb = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+class EncodingCache:
+    """LRU cache of face encodings keyed by a perceptual hash of the face crop
+
+    A lookup returns the encoding whose hash is within max_distance bits of the query, so a
+    person standing still is encoded once instead of on every detection. Only encodings are
+    kept, never names: callers still match every encoding against the gallery, so gallery
+    changes apply at once. Entries expire after max_age seconds and the least recently used
+    one is evicted beyond capacity.
+    """
+    def __init__(self, capacity=CACHE_CAPACITY, max_age=CACHE_MAX_AGE, max_distance=MAX_HASH_DISTANCE):
+        self.capacity = capacity
+        self.max_age = max_age
+        self.max_distance = max_distance
+        self.entries = OrderedDict()  # hash -> (encoding, created), most recently used last
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.encode_ms = None  # Running mean of the encoding time per face, to estimate savings
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, now=None):
+        """Return the encoding of a cached near-identical crop, or None"""
+        if key is None:
+            self.misses += 1
+            return None
+        now = time.time() if now is None else now
+        self.expire(now)
+        best = None
+        best_distance = self.max_distance + 1
+        if key in self.entries:
+            best, best_distance = key, 0
+        else:
+            for cached in self.entries:
+                distance = hamming(key, cached)
+                if distance < best_distance:
+                    best, best_distance = cached, distance
+        if best is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(best)
+        self.hits += 1
+        return self.entries[best][0]
+
+    def put(self, key, encoding, now=None):
+        if key is None:
+            return
+        self.entries[key] = (encoding, time.time() if now is None else now)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def expire(self, now):
+        """Drop entries older than max_age"""
+        stale = [key for key, (_, created) in self.entries.items() if now - created > self.max_age]
+        for key in stale:
+            del self.entries[key]
+        self.evictions += len(stale)
+
+    def clear(self):
+        self.entries.clear()
+
+    def record_encode(self, ms, faces):
+        """Update the mean encoding time per face from a batch of misses"""
+        if faces:
+            per_face = ms / faces
+            self.encode_ms = per_face if self.encode_ms is None else 0.9 * self.encode_ms + 0.1 * per_face
+
+    def saved_ms(self, hits):
+        """Estimated encoding time saved by hits (before the cost of hashing and lookup)"""
+        return hits * (self.encode_ms or 0.0)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "encode_ms": self.encode_ms or 0.0,
+        }
@@ -0,0 +1,98 @@
+import os
+import cv2
+
+# Configuration
+DETECTOR = "hog"  # Default backend: "hog" (dlib), "haar" (OpenCV cascade) or "dnn" (OpenCV DNN, needs a model file)
+HAAR_CASCADE = os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")  # Bundled with OpenCV 4.x
+HAAR_SCALE_FACTOR = 1.1   # Image pyramid step of the cascade (higher = faster, fewer detections)
+HAAR_MIN_NEIGHBORS = 5    # Overlapping hits needed to accept a face (higher = fewer false positives)
+HAAR_MIN_SIZE = 24        # Smallest face in pixels of the detection frame
+DNN_MODEL = "res10_300x300_ssd_iter_140000.caffemodel"  # OpenCV's SSD face detector weights
+DNN_CONFIG = "deploy.prototxt"                           # Network description for DNN_MODEL
+DNN_INPUT_SIZE = 300      # Network input size in pixels
+DNN_CONFIDENCE = 0.6      # Minimum detection confidence
+DNN_MEAN = (104.0, 177.0, 123.0)  # BGR mean the SSD model was trained with
+
+# Every backend returns boxes as (top, right, bottom, left) integer tuples in the pixels of
+# the RGB image it was given, clipped to the image: the format face_recognition.face_encodings
+# expects. upsample is the number of times the image is doubled to find smaller faces.
+
+def clip_box(top, right, bottom, left, shape):
+    """Clip a box to the image and return it as ints in face_recognition order"""
+    height, width = shape[:2]
+    return (max(0, int(top)), min(width, int(right)), min(height, int(bottom)), max(0, int(left)))
+
+class HogDetector:
+    """dlib's HOG detector through face_recognition (the original behaviour)"""
+    name = "hog"
+
+    def __init__(self):
+        import face_recognition
+        self.face_recognition = face_recognition
+
+    def detect(self, rgb, upsample=0):
+        return self.face_recognition.face_locations(rgb, number_of_times_to_upsample=upsample, model="hog")
+
+class HaarDetector:
+    """OpenCV's frontal-face Haar cascade, bundled with cv2; cheaper than HOG but less robust to pose"""
+    name = "haar"
+
+    def __init__(self, cascade=HAAR_CASCADE):
+        if not hasattr(cv2, "CascadeClassifier"):
+            raise RuntimeError(f"This OpenCV build ({cv2.__version__}) has no Haar cascade support")
+        self.cascade = cv2.CascadeClassifier(cascade)
+        if self.cascade.empty():
+            raise RuntimeError(f"Cannot load Haar cascade {cascade}")
+
+    def detect(self, rgb, upsample=0):
+        gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        factor = 2 ** upsample
+        if factor > 1:
+            gray = cv2.resize(gray, (0, 0), fx=factor, fy=factor, interpolation=cv2.INTER_LINEAR)
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=HAAR_SCALE_FACTOR, minNeighbors=HAAR_MIN_NEIGHBORS,
+                                              minSize=(HAAR_MIN_SIZE, HAAR_MIN_SIZE))
+        return [clip_box(y / factor, (x + w) / factor, (y + h) / factor, x / factor, rgb.shape)
+                for x, y, w, h in faces]
+
+class DnnDetector:
+    """OpenCV DNN face detector (SSD output layout, e.g. the res10 Caffe model)
+
+    The network runs at a fixed input size, so upsample has no effect.
+    """
+    name = "dnn"
+
+    def __init__(self, model=DNN_MODEL, config=DNN_CONFIG, confidence=DNN_CONFIDENCE):
+        if not os.path.exists(model):
+            raise FileNotFoundError(f"DNN face detector model {model} not found")
+        self.net = cv2.dnn.readNet(model, config if config and os.path.exists(config) else "")
+        self.confidence = confidence
+
+    def detect(self, rgb, upsample=0):
+        height, width = rgb.shape[:2]
+        blob = cv2.dnn.blobFromImage(rgb, 1.0, (DNN_INPUT_SIZE, DNN_INPUT_SIZE), DNN_MEAN, swapRB=True)
+        self.net.setInput(blob)
+        detections = self.net.forward().reshape(-1, 7)
+        boxes = []
+        for _, _, score, x1, y1, x2, y2 in detections:
+            if score < self.confidence:
+                continue
+            box = clip_box(y1 * height, x2 * width, y2 * height, x1 * width, rgb.shape)
+            if box[2] > box[0] and box[1] > box[3]:
+                boxes.append(box)
+        return boxes
+
+BACKENDS = {"hog": HogDetector, "haar": HaarDetector, "dnn": DnnDetector}
+
+def create_detector(kind=DETECTOR, **options):
+    """Create a detector backend by name; raises ValueError for unknown names"""
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown face detector '{kind}', expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[kind](**options)
+
+detectors = {}  # Created on first use in each process
+
+def get_detector(kind=DETECTOR):
+    """Return this process's detector of the given kind, creating it on first use"""
+    if kind not in detectors:
+        detectors[kind] = create_detector(kind)
+    return detectors[kind]
@@ -0,0 +1,137 @@
+import cv2
+import numpy as np
+
+# Configuration
+TRACK_SCALE = 4             # Downscale factor of the grayscale frame used for optical flow
+TRACK_IOU_THRESHOLD = 0.3   # Minimum overlap for a detection to continue a track
+MAX_MISSED_DETECTIONS = 2   # Detections a track may miss before it is dropped
+MIN_FLOW_POINTS = 5         # Tracked feature points needed to trust an optical flow update
+IDENTITY_TTL = 3.0          # Seconds a track's identity is reused before the face is encoded again
+
+def box_iou(a, b):
+    """Intersection over union of two (top, right, bottom, left) boxes"""
+    top = max(a[0], b[0])
+    right = min(a[1], b[1])
+    bottom = min(a[2], b[2])
+    left = max(a[3], b[3])
+    intersection = max(0, right - left) * max(0, bottom - top)
+    if intersection == 0:
+        return 0.0
+    area_a = (a[1] - a[3]) * (a[2] - a[0])
+    area_b = (b[1] - b[3]) * (b[2] - b[0])
+    return intersection / float(area_a + area_b - intersection)
+
+class Track:
+    """A face followed across frames, with the identity it was last recognized as"""
+    def __init__(self, track_id, box, name, identified_at):
+        self.track_id = track_id
+        self.box = [float(v) for v in box]  # (top, right, bottom, left) in full-frame pixels
+        self.name = name
+        self.identified_at = identified_at  # When the name was last confirmed by an encoding
+        self.missed = 0
+
+class FaceTracker:
+    """Follow face boxes between detections with sparse optical flow and keep each track's identity"""
+    def __init__(self, scale=TRACK_SCALE):
+        self.scale = scale
+        self.tracks = []
+        self.prev_gray = None
+        self.next_id = 1
+
+    def update(self, frame):
+        """Move every track into a new BGR frame; return True if a track was lost"""
+        gray = cv2.cvtColor(cv2.resize(frame, (0, 0), fx=1/self.scale, fy=1/self.scale), cv2.COLOR_BGR2GRAY)
+        lost = False
+        if self.tracks and self.prev_gray is not None and self.prev_gray.shape == gray.shape:
+            kept = []
+            for track in self.tracks:
+                shift = self.flow_shift(track, gray)
+                if shift is None:
+                    lost = True
+                    continue
+                dx, dy = shift
+                track.box = [track.box[0] + dy, track.box[1] + dx, track.box[2] + dy, track.box[3] + dx]
+                kept.append(track)
+            self.tracks = kept
+        self.prev_gray = gray
+        return lost
+
+    def flow_shift(self, track, gray):
+        """Median optical-flow displacement of the features inside a track's box, or None if lost"""
+        height, width = gray.shape
+        top, right, bottom, left = [int(round(v / self.scale)) for v in track.box]
+        top, bottom = max(0, top), min(height, bottom)
+        left, right = max(0, left), min(width, right)
+        if bottom - top < 2 or right - left < 2:
+            return None
+
+        mask = np.zeros_like(self.prev_gray)
+        mask[top:bottom, left:right] = 255
+        points = cv2.goodFeaturesToTrack(self.prev_gray, maxCorners=20, qualityLevel=0.01,
+                                         minDistance=2, mask=mask)
+        if points is None or len(points) < MIN_FLOW_POINTS:
+            return None
+
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points, None,
+                                                         winSize=(15, 15), maxLevel=2)
+        good = status.ravel() == 1
+        if good.sum() < MIN_FLOW_POINTS:
+            return None
+        dx, dy = np.median((new_points[good] - points[good]).reshape(-1, 2), axis=0) * self.scale
+        return float(dx), float(dy)
+
+    def apply_detections(self, locations, names, reused, now):
+        """Associate a recognition result with the tracks, creating and retiring tracks as needed"""
+        pairs = sorted(
+            ((box_iou(track.box, location), t, d)
+             for t, track in enumerate(self.tracks)
+             for d, location in enumerate(locations)),
+            reverse=True
+        )
+
+        # Greedy one-to-one matching by overlap
+        matched_tracks = set()
+        matched_detections = set()
+        for overlap, t, d in pairs:
+            if overlap < TRACK_IOU_THRESHOLD:
+                break
+            if t in matched_tracks or d in matched_detections:
+                continue
+            matched_tracks.add(t)
+            matched_detections.add(d)
+            track = self.tracks[t]
+            track.box = [float(v) for v in locations[d]]
+            track.missed = 0
+            if not reused[d]:
+                track.name = names[d]
+                track.identified_at = now
+
+        kept = []
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+                if track.missed > MAX_MISSED_DETECTIONS:
+                    continue
+            kept.append(track)
+        for d, location in enumerate(locations):
+            if d not in matched_detections:
+                kept.append(Track(self.next_id, location, names[d], now))
+                self.next_id += 1
+        self.tracks = kept
+
+    def known_faces(self, now, scale=1):
+        """Boxes (divided by scale) and names of tracks whose identity can still be reused"""
+        return [(tuple(int(round(v / scale)) for v in track.box), track.name)
+                for track in self.tracks
+                if track.name not in (None, "Unknown") and now - track.identified_at < IDENTITY_TTL]
+
+    def results(self):
+        """Current face locations (full-frame pixels) and names of all tracks"""
+        locations = [tuple(int(round(v)) for v in track.box) for track in self.tracks]
+        names = [track.name for track in self.tracks]
+        return locations, names
+
+    def reset(self):
+        """Forget every track"""
+        self.tracks = []
+        self.prev_gray = None
@@ -1,65 +1,183 @@
-import face_recognition
 import cv2
 import numpy as np
 import time
-import pickle
 import os
 import threading
 from datetime import datetime
 import csv
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
-from gpiozero import LED
-from collections import deque
-import multiprocessing
+from recognition_pool import RecognitionPool
+from gallery import ENCODING_DIM
+from gallery_service import LiveGallery
+from face_detectors import get_detector
+from encoding_cache import EncodingCache, crop_hash
+from load_controller import LoadController
+from face_tracker import FaceTracker, box_iou, TRACK_IOU_THRESHOLD
+from motion_gate import MotionGate
+from camera_grabber import CameraGrabber
+from checkin_writer import CheckinWriter
+from checkin_image_store import image_path, face_crop, SAVE_FULL_FRAME
+from video_renderer import VideoRenderer
+from metrics import REGISTRY, MetricsExporter
 
 # Configuration
-CAMERA_URL = "http://10.136.44.208:8080/video"  # Replace with your camera URL
+CAMERA_URL = "http://10.136.44.208:8080/video"  # Replace with your camera URL (or a device index / video file)
+CAMERA_FALLBACK = 0  # Camera tried when CAMERA_URL cannot be opened
+CONNECT_TIMEOUT = 10  # Seconds to wait for the first frame when starting
+FRAME_TIMEOUT = 1.0  # Seconds without a new frame before the camera is reported as failing
+LOOP_VIDEO_FILES = False  # Restart a video file source when it ends instead of stopping
 CHECKIN_FILE = "checkin_log.csv"
 IMG_FOLDER = "checkin_images"
-cv_scaler = 8  # Increased scale factor for faster processing (was 6)
+cv_scaler = 8  # Scale factor of the frame used for face detection (higher = faster)
+ENCODE_SCALE = 2  # Scale factor of the frame faces are encoded from (lower = more accurate)
 GPIO_PIN = 14  # GPIO pin for access control
 
 # Performance optimization settings
-SKIP_FRAMES = 2  # Process every nth frame (skip frames for speed)
+SKIP_FRAMES = 2  # Process every nth frame while no face is tracked (skip frames for speed)
 MAX_FACES = 3    # Maximum number of faces to process per frame
 RECOGNITION_TOLERANCE = 0.6  # Face recognition tolerance (higher = faster but less accurate)
-FRAME_BUFFER_SIZE = 5  # Size of frame buffer for smoothing
+DETECTOR = "hog"  # Face detector backend: "hog" (dlib), "haar" (OpenCV cascade, faster) or "dnn" (needs a model file, see face_detectors.py)
+DETECT_UPSAMPLE = 1  # Times the detection frame is upsampled to find smaller faces (0 = fastest)
+ENCODING_MODEL = "small"  # Landmark model used for encoding: "small" (5 points, faster) or "large" (68 points)
+ENCODING_CACHE = True  # Reuse encodings of near-identical face crops (see encoding_cache.py)
+AUTO_TUNE = True  # Adjust SKIP_FRAMES, cv_scaler and MAX_FACES at runtime to hold a latency target (see load_controller.py)
+TRACK_DETECT_EVERY = 10  # Run full detection every nth frame while all faces are tracked
+ROI_DETECTION = False  # Between full-frame detections, only look for faces around existing tracks
+ROI_FULL_DETECT_EVERY = 3  # With ROI_DETECTION, every nth detection still scans the whole frame
+ROI_MARGIN = 0.5  # Region of interest around a track, as a fraction of the face size on each side
+ROI_FACE_SIZE = 80  # Face height in pixels that regions of interest are shrunk to
+RECOGNITION_WORKERS = 3  # Recognition processes (Pi 4 has 4 cores: leave one for capture and UI)
+STOP_TIMEOUT = 3.0  # Seconds to wait for the processing thread to finish its frame on stop
+FRAME_SLOT_BYTES = 1280 * 720 * 3  # Largest frame passed to the recognition workers
+INDEX_KIND = "exact"  # Gallery search index: "exact" or "cluster" (approximate, for large galleries)
 
-# Setup directories and files 
-if not os.path.exists(IMG_FOLDER):
-    os.makedirs(IMG_FOLDER)
+# Pipeline metrics, exported by MetricsExporter (Prometheus endpoint and JSON snapshot)
+frame_seconds = REGISTRY.histogram("checkin_frame_processing_seconds", "Time to handle one frame on the processing thread")
+detect_seconds = REGISTRY.histogram("checkin_detect_seconds", "Face detection time per recognized frame")
+encode_seconds = REGISTRY.histogram("checkin_encode_seconds", "Face encoding time per recognized frame")
+match_seconds = REGISTRY.histogram("checkin_match_seconds", "Gallery matching time per recognized frame")
+recognition_latency = REGISTRY.histogram("checkin_recognition_latency_seconds",
+                                         "Time from handing a frame to the workers until its result is applied")
+frames_processed = REGISTRY.counter("checkin_frames_processed_total", "Frames handled by the processing thread")
+frames_submitted = REGISTRY.counter("checkin_frames_submitted_total", "Frames handed to the recognition workers")
+recognitions_total = REGISTRY.counter("checkin_recognitions_total", "Recognition results applied")
+known_faces_total = REGISTRY.counter("checkin_faces_total", "Faces in applied results", {"result": "known"})
+unknown_faces_total = REGISTRY.counter("checkin_faces_total", "Faces in applied results", {"result": "unknown"})
+checkins_total = REGISTRY.counter("checkin_checkins_total", "Check-ins logged")
+gpio_toggles = REGISTRY.counter("checkin_gpio_toggles_total", "Times the door output changed state")
+fps_gauge = REGISTRY.gauge("checkin_fps", "Frames per second of the processing thread")
 
-if not os.path.exists(CHECKIN_FILE):
-    with open(CHECKIN_FILE, mode="w", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow(["Name", "Timestamp"])
+cache_hits = REGISTRY.counter("checkin_encoding_cache_hits_total", "Faces whose encoding came from the cache")
+cache_misses = REGISTRY.counter("checkin_encoding_cache_misses_total", "Faces looked up in the cache and encoded")
+cache_saved_seconds = REGISTRY.counter("checkin_encoding_cache_saved_seconds_total",
+                                       "Estimated encoding time saved by cache hits")
+cache_lookup_seconds = REGISTRY.counter("checkin_encoding_cache_lookup_seconds_total",
+                                        "Time spent hashing face crops and searching the cache")
+REGISTRY.gauge("checkin_encoding_cache_hit_rate", "Share of cache lookups that were hits",
+               function=lambda: cache_hits.get() / max(cache_hits.get() + cache_misses.get(), 1))
 
-# Initialize GPIO
-try:
-    output = LED(GPIO_PIN)
-    gpio_available = True
-    print(f"GPIO initialized on pin {GPIO_PIN}")
-except:
-    gpio_available = False
-    print("GPIO not available, running in software-only mode")
+startup_seconds = REGISTRY.gauge("checkin_startup_seconds", "Seconds from start to the first recognition")
 
-# Load face encodings
-print("[INFO] Loading encodings...")
-try:
-    with open("encodings.pickle", "rb") as f:
-        data = pickle.loads(f.read())
-    known_face_encodings = data["encodings"]
-    known_face_names = data["names"]
-    print(f"Loaded {len(known_face_names)} face encodings")
+# Metrics kept per camera; in multi-camera mode each camera gets a copy labeled with its id
+CAMERA_METRICS = {
+    "frames": frames_processed,
+    "frame_seconds": frame_seconds,
+    "submitted": frames_submitted,
+    "recognitions": recognitions_total,
+    "latency": recognition_latency,
+    "checkins": checkins_total,
+    "fps": fps_gauge,
+}
+
+def camera_metrics(camera_id=None):
+    """The per-camera metrics: the unlabeled ones, or copies labeled camera=camera_id"""
+    if camera_id is None:
+        return dict(CAMERA_METRICS)
+    return {key: REGISTRY.get_or_create(type(metric), metric.name, metric.description, {"camera": camera_id})
+            for key, metric in CAMERA_METRICS.items()}
+
+# Runtime state, set up by init_runtime() and load_face_models() on first use
+face_recognition = None  # Imported lazily: the import loads dlib's models
+output = None
+gpio_available = False
+gallery = None
+known_face_encodings = None
+face_index = None
+encoding_cache = EncodingCache()  # Each worker process fills its own copy
+init_lock = threading.Lock()
+initialized = set()
+
+def load_face_models():
+    """Import face_recognition (which loads the dlib models) on first use"""
+    global face_recognition
+    if face_recognition is None:
+        import face_recognition as module
+        face_recognition = module
+    return face_recognition
+
+def init_storage():
+    """Create the check-in image folder and CSV log"""
+    if not os.path.exists(IMG_FOLDER):
+        os.makedirs(IMG_FOLDER)
     
-    # Convert to numpy array for faster processing
-    known_face_encodings = np.array(known_face_encodings)
+    if not os.path.exists(CHECKIN_FILE):
+        with open(CHECKIN_FILE, mode="w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Name", "Timestamp"])
+
+def init_gpio():
+    """Claim the door output pin, or fall back to software-only mode"""
+    global output, gpio_available
+    try:
+        from gpiozero import LED
+        output = LED(GPIO_PIN)
+        gpio_available = True
+        print(f"GPIO initialized on pin {GPIO_PIN}")
+    except Exception:
+        gpio_available = False
+        print("GPIO not available, running in software-only mode")
+
+def load_gallery():
+    """Load the face gallery (memory-mapped, shared read-only with worker processes) and its index
+    
+    Workers keep it up to date with enrollments (gallery_service.py) while running.
+    """
+    global gallery, known_face_encodings, face_index
+    print("[INFO] Loading encodings...")
+    try:
+        face_index = LiveGallery(kind=INDEX_KIND)
+        gallery = face_index.gallery
+        known_face_encodings = gallery.encodings
+        print(f"Loaded {len(face_index)} face encodings for {len(face_index.view.people())} people ({INDEX_KIND} index)")
+    except Exception as e:
+        raise RuntimeError(f"Error loading encodings: {e}") from e
+
+def init_runtime(storage=True, gpio=True):
+    """One-time setup: files, GPIO and the face gallery; later calls do nothing
     
-except Exception as e:
-    print(f"Error loading encodings: {e}")
-    exit()
+    Recognition workers inherit the gallery, so this must run before they start.
+    Raises RuntimeError if the gallery cannot be loaded.
+    """
+    with init_lock:
+        if storage and "storage" not in initialized:
+            init_storage()
+            initialized.add("storage")
+        if gpio and "gpio" not in initialized:
+            init_gpio()
+            initialized.add("gpio")
+        if "gallery" not in initialized:
+            load_gallery()
+            initialized.add("gallery")
+
+def warm_up():
+    """Load the dlib models and run one dummy detection, encoding and match"""
+    models = load_face_models()
+    dummy = np.zeros((120, 160, 3), dtype=np.uint8)
+    get_detector(DETECTOR).detect(dummy, 0)
+    models.face_encodings(dummy, [(20, 120, 100, 40)], model=ENCODING_MODEL)
+    if face_index is not None and len(face_index):
+        face_index.match(np.zeros((1, ENCODING_DIM), dtype=np.float32), RECOGNITION_TOLERANCE)
 
 # List of names that will trigger the GPIO pin (authorize access)
 authorized_names = {"TungLam", "Nanh", "MinhHuyen", "DuongHuyen"}  # Use set for O(1) lookup
@@ -81,11 +199,25 @@ def show_message_box(name, is_authorized=False):
     message_thread.start()
 
 class OptimizedFaceRecognition:
-    def __init__(self, video_label=None, status_callback=None):
+    def __init__(self, video_label=None, status_callback=None, camera_id=None, sources=None, stream=0):
         self.video_label = video_label
+        self.renderer = VideoRenderer(video_label) if video_label else None
         self.status_callback = status_callback
         self.running = False
-        self.cap = None
+        self.grabber = None
+        self.process_thread = None
+        self.writer = None
+        
+        # Camera identity; several cameras can share one pool (see multi_camera.py)
+        self.camera_id = camera_id
+        self.sources = sources if sources is not None else [CAMERA_URL, CAMERA_FALLBACK]
+        self.stream = stream  # Pool stream this camera publishes frames to
+        self.loop = LOOP_VIDEO_FILES
+        self.labels = {"camera": camera_id} if camera_id else None
+        self.metrics = camera_metrics(camera_id)
+        self.shared = False  # Pool and writer belong to a MultiCameraCheckin
+        self.on_door = None  # Called with (recognizer, open) instead of driving the GPIO pin
+        self.show_messages = True
         
         # Check-in status variables
         self.checkin_done = False
@@ -101,35 +233,39 @@ class OptimizedFaceRecognition:
         self.frame_counter = 0
         self.last_face_locations = []
         self.last_face_names = []
-        self.face_tracking_buffer = deque(maxlen=FRAME_BUFFER_SIZE)
+        self.last_submit_frame = 0
+        self.roi_detections = 0
+        self.tracker = FaceTracker()
+        self.motion_gate = MotionGate()
+        
+        # Settings the load controller may change while running
+        self.skip_frames = SKIP_FRAMES
+        self.cv_scaler = cv_scaler
+        self.max_faces = MAX_FACES
+        self.controller = None
+        if AUTO_TUNE:
+            self.controller = LoadController(SKIP_FRAMES, cv_scaler, MAX_FACES, camera_id)
+            self.apply_tuning(self.controller.settings)
         
         # Async processing
-        self.processing_queue = multiprocessing.Queue(maxsize=3)
-        self.result_queue = multiprocessing.Queue(maxsize=3)
+        self.pool = None
         self.processing_active = False
+        self.metrics_exporter = None
+        self.door_open = False
+        
+        # Startup timing
+        self.start_time = None
+        self.camera_time = None
+        self.first_recognition_time = None
         
     def connect_camera(self):
-        """Connect to the camera with optimized settings"""
-        print(f"[INFO] Attempting to connect to camera at {CAMERA_URL}")
-        self.cap = cv2.VideoCapture(CAMERA_URL)
-        
-        # Try to open default camera if URL fails
-        if not self.cap.isOpened():
-            print("[INFO] Cannot connect to IP camera, trying default camera...")
-            self.cap = cv2.VideoCapture(0)
-            if not self.cap.isOpened():
-                print("[ERROR] Cannot connect to any camera")
-                return False
-        
-        # Optimize camera settings for performance
-        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer size
-        self.cap.set(cv2.CAP_PROP_FPS, 30)  # Set FPS
-        
-        # Try to set resolution for better performance
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 400)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 300)
-        
-        print("[INFO] Camera connected successfully")
+        """Start the capture thread and wait for the first frame"""
+        self.grabber = CameraGrabber(self.sources, loop=self.loop)
+        self.grabber.start()
+        if not self.grabber.wait_connected(CONNECT_TIMEOUT):
+            self.grabber.stop()
+            self.grabber = None
+            return False
         return True
         
     def start(self):
@@ -138,14 +274,41 @@ class OptimizedFaceRecognition:
             return
             
         self.running = True
+        self.start_time = time.time()
+        self.first_recognition_time = None
+        
+        try:
+            init_runtime()
+        except RuntimeError as e:
+            print(f"[ERROR] {e}")
+            self.running = False
+            if self.status_callback:
+                self.status_callback(str(e))
+            return False
+        
+        # Workers load the dlib models while the camera connects
+        if not self.shared:
+            self.start_async_processing()
         
         if not self.connect_camera():
+            if not self.shared:
+                self.pool.stop()
+                self.pool = None
+            self.running = False
             if self.status_callback:
                 self.status_callback("Failed to connect to camera")
             return False
+        self.camera_time = time.time()
+        
+        # Start the check-in writer
+        if not self.shared:
+            self.writer = CheckinWriter(CHECKIN_FILE, image_root=IMG_FOLDER)
+            self.writer.start()
+        self.start_metrics()
         
-        # Start async processing
-        self.start_async_processing()
+        # Video is drawn from the Tk main loop at a capped frame rate
+        if self.renderer:
+            self.renderer.start()
         
         # Start main processing thread
         self.process_thread = threading.Thread(target=self.process_video)
@@ -154,27 +317,109 @@ class OptimizedFaceRecognition:
         return True
         
     def start_async_processing(self):
-        """Start async face recognition processing"""
+        """Start the pool of recognition worker processes"""
         self.processing_active = True
-        self.processor = multiprocessing.Process(target=self.async_face_processor)
-        self.processor.daemon = True
-        self.processor.start()
+        self.pool = RecognitionPool(self.recognize_frame, RECOGNITION_WORKERS, FRAME_SLOT_BYTES, warmup=warm_up)
+        self.pool.start()
+        self.motion_gate.worker_pids = [process.pid for process in self.pool.processes]
+        
+    def share(self, pool, writer, on_door=None):
+        """Use a recognition pool and check-in writer owned by someone else (multi-camera mode)
+        
+        They are neither started nor stopped by this recognizer. on_door replaces direct
+        control of the GPIO pin, so several cameras can drive one door output.
+        """
+        self.shared = True
+        self.pool = pool
+        self.writer = writer
+        self.on_door = on_door
+        self.motion_gate.worker_pids = [process.pid for process in pool.processes]
+        
+    def start_metrics(self):
+        """Expose queue depths and component counters and start the metrics exporter"""
+        REGISTRY.counter("checkin_camera_frames_total", "Frames read from the camera", self.labels,
+                         function=lambda: self.grabber.frames if self.grabber else 0)
+        REGISTRY.counter("checkin_camera_dropped_frames_total", "Camera frames replaced before processing", self.labels,
+                         function=lambda: self.grabber.dropped if self.grabber else 0)
+        REGISTRY.counter("checkin_camera_reconnects_total", "Camera reconnect attempts", self.labels,
+                         function=lambda: self.grabber.reconnects if self.grabber else 0)
+        REGISTRY.gauge("checkin_camera_connected", "1 while the camera delivers frames", self.labels,
+                       function=lambda: int(bool(self.grabber and self.grabber.connected)))
+        REGISTRY.gauge("checkin_recognition_queue_depth", "Frames waiting for a recognition worker",
+                       function=lambda: self.pool.pending() if self.pool else 0)
+        REGISTRY.counter("checkin_recognition_dropped_frames_total", "Frames replaced before a worker took them",
+                         function=lambda: self.pool.dropped if self.pool else 0)
+        REGISTRY.counter("checkin_recognition_stale_results_total", "Results discarded because a newer one was applied",
+                         function=lambda: self.pool.stale if self.pool else 0)
+        REGISTRY.gauge("checkin_writer_queue_depth", "Images and log rows waiting for the writer",
+                       function=lambda: self.writer.queue.qsize() if self.writer else 0)
+        REGISTRY.counter("checkin_image_bytes_total", "Bytes of check-in images written",
+                         function=lambda: self.writer.image_bytes if self.writer else 0)
+        REGISTRY.gauge("checkin_image_store_bytes", "Total size of the kept check-in images",
+                       function=lambda: self.writer.images.total_bytes if self.writer and self.writer.images else 0)
+        REGISTRY.counter("checkin_writer_dropped_total", "Images and log rows dropped because the writer queue was full",
+                         function=lambda: self.writer.dropped if self.writer else 0)
+        REGISTRY.gauge("checkin_skip_frames", "Frames between detections while nobody is tracked", self.labels,
+                       function=lambda: self.skip_frames)
+        REGISTRY.gauge("checkin_detect_scale", "Scale factor of the detection frame (cv_scaler)", self.labels,
+                       function=lambda: self.cv_scaler)
+        REGISTRY.gauge("checkin_max_faces", "Faces processed per frame", self.labels,
+                       function=lambda: self.max_faces)
+        REGISTRY.counter("checkin_load_adjustments_total", "Settings changed by the load controller", self.labels,
+                         function=lambda: self.controller.adjustments if self.controller else 0)
+        if not self.shared:
+            self.metrics_exporter = MetricsExporter()
+            self.metrics_exporter.start()
         
     def stop(self):
         """Stop the face recognition process"""
         self.running = False
         self.processing_active = False
         
-        if hasattr(self, 'processor'):
-            self.processor.terminate()
-            self.processor.join(timeout=1)
+        # Stop capture first: it wakes the processing loop, which must exit before the pool goes away
+        if self.grabber:
+            self.grabber.stop()
+            stats = self.grabber.stats()
+            print(f"[INFO] Camera: {stats['frames']} frames, {stats['dropped']} dropped, "
+                  f"{stats['reconnects']} reconnect attempts")
+        if self.process_thread and self.process_thread is not threading.current_thread():
+            self.process_thread.join(timeout=STOP_TIMEOUT)
+            if self.process_thread.is_alive():
+                print(f"[ERROR] Processing thread did not stop within {STOP_TIMEOUT}s")
+        
+        if self.pool and not self.shared:
+            self.pool.stop()
+            self.pool = None
             
-        if self.cap:
-            self.cap.release()
+        if self.renderer:
+            self.renderer.stop()
+            stats = self.renderer.stats()
+            print(f"[INFO] Display: {stats['rendered']} frames drawn, {stats['skipped']} skipped")
+            
+        report = self.motion_gate.report()
+        if report["wake_count"]:
+            print(f"[INFO] Motion gate: idle CPU {report['idle_cpu_percent']:.1f}% over {report['idle_seconds']:.0f}s, "
+                  f"wake-to-recognition avg {report['wake_latency_avg']:.2f}s, max {report['wake_latency_max']:.2f}s")
+        else:
+            print(f"[INFO] Motion gate: idle CPU {report['idle_cpu_percent']:.1f}% over {report['idle_seconds']:.0f}s")
+        
+        # Flush pending check-ins to disk
+        if self.writer and not self.shared:
+            self.writer.stop()
+            stats = self.writer.stats()
+            print(f"[INFO] Writer: {stats['rows_written']} rows, {stats['images_written']} images "
+                  f"({stats['image_bytes'] / max(stats['images_written'], 1) / 1024:.1f} KB each), "
+                  f"{stats['images_evicted']} old images removed, "
+                  f"{stats['dropped']} dropped, latency avg {stats['latency_avg'] * 1000:.1f} ms, "
+                  f"max {stats['latency_max'] * 1000:.1f} ms")
+            self.writer = None
+        
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
         
         # Turn off GPIO pin when stopping
-        if gpio_available:
-            output.off()
+        self.set_door(False)
             
     def calculate_fps(self):
         """Calculate and return the current FPS"""
@@ -186,122 +431,246 @@ class OptimizedFaceRecognition:
             self.fps_start_time = time.time()
         return self.fps
         
-    def async_face_processor(self):
-        """Async face recognition processor"""
-        while self.processing_active:
-            try:
-                # Get frame from queue with timeout
-                if not self.processing_queue.empty():
-                    frame_data = self.processing_queue.get(timeout=0.1)
-                    
-                    # Process the frame
-                    face_locations, face_names = self.recognize_faces(frame_data)
-                    
-                    # Put result back
-                    if not self.result_queue.full():
-                        self.result_queue.put((face_locations, face_names))
-                        
-            except:
-                continue
-                
-    def recognize_faces(self, rgb_frame):
-        """Fast face recognition on a frame"""
-        # Find faces with optimized settings
-        face_locations = face_recognition.face_locations(
-            rgb_frame, 
-            number_of_times_to_upsample=1,  # Reduced for speed
-            model="hog"  # HOG is faster than CNN
-        )
+    def detect_faces(self, rgb_frame, detect_scale=1, rois=None):
+        """Detect faces on a copy of the frame shrunk by detect_scale, or only inside rois
+        
+        Returned boxes are in the pixels of rgb_frame.
+        """
+        load_face_models()
+        detector = get_detector(DETECTOR)
+        if rois:
+            face_locations = []
+            for top, right, bottom, left in rois:
+                # Shrink each region so the face inside is about ROI_FACE_SIZE pixels tall
+                roi_scale = max(1.0, (bottom - top) / (ROI_FACE_SIZE * (1 + 2 * ROI_MARGIN)))
+                crop = rgb_frame[top:bottom, left:right]
+                if roi_scale > 1:
+                    crop = cv2.resize(crop, (0, 0), fx=1/roi_scale, fy=1/roi_scale)
+                for t, r, b, l in detector.detect(np.ascontiguousarray(crop), 0):
+                    face_locations.append((int(t * roi_scale) + top, int(r * roi_scale) + left,
+                                           int(b * roi_scale) + top, int(l * roi_scale) + left))
+            return face_locations
+        
+        small_frame = rgb_frame
+        if detect_scale > 1:
+            small_frame = cv2.resize(rgb_frame, (0, 0), fx=1/detect_scale, fy=1/detect_scale)
+        
+        # Find faces with optimized settings (HOG is faster than CNN, Haar faster still)
+        face_locations = detector.detect(small_frame, DETECT_UPSAMPLE)
+        
+        # Map boxes back to the resolution used for encoding
+        return [tuple(int(v * detect_scale) for v in location) for location in face_locations]
+        
+    def recognize_faces(self, rgb_frame, scale=1, detect_scale=1, known_faces=(), rois=None, timings=None,
+                        max_faces=None):
+        """Fast face recognition on a frame
+        
+        Faces are detected on a copy shrunk by detect_scale (or inside rois) and encoded from
+        rgb_frame itself, so encodings keep the higher resolution. Faces overlapping a box in
+        known_faces reuse that track's name instead of being encoded again, and with
+        ENCODING_CACHE, crops that look like a recently encoded one reuse its encoding (it is
+        still matched against the gallery). Boxes in
+        known_faces and rois are in rgb_frame pixels; locations are returned multiplied by
+        scale (full-frame pixels). If a timings dict is given, the milliseconds spent in
+        detection, and in encoding and matching when new faces were encoded, are stored in it.
+        """
+        load_face_models()
         
         # Limit number of faces to process
-        face_locations = face_locations[:MAX_FACES]
+        t0 = time.perf_counter()
+        face_locations = self.detect_faces(rgb_frame, detect_scale, rois)[:MAX_FACES if max_faces is None else max_faces]
+        t1 = time.perf_counter()
         
-        face_names = []
+        # Reuse identities of faces that are already tracked
+        face_names = [None] * len(face_locations)
+        reused = [False] * len(face_locations)
+        for i, location in enumerate(face_locations):
+            for box, name in known_faces:
+                if box_iou(location, box) >= TRACK_IOU_THRESHOLD:
+                    face_names[i] = name
+                    reused[i] = True
+                    break
         
-        if face_locations:
-            # Get face encodings with optimized model
-            face_encodings = face_recognition.face_encodings(
+        new_locations = [location for location, name in zip(face_locations, face_names) if name is None]
+        t_encode = t1
+        if new_locations and ENCODING_CACHE:
+            # Crops that look like a recently encoded one reuse its encoding
+            keys = [crop_hash(rgb_frame, location) for location in new_locations]
+            cached = [encoding_cache.get(key) for key in keys]
+            t_lookup = time.perf_counter()
+            hits = sum(1 for hit in cached if hit is not None)
+            if timings is not None:
+                timings["cache_hits"] = hits
+                timings["cache_misses"] = len(cached) - hits
+                timings["cache_saved"] = encoding_cache.saved_ms(hits)
+                timings["cache_lookup"] = (t_lookup - t1) * 1000
+            t_encode = t_lookup
+        else:
+            keys = [None] * len(new_locations)
+            cached = [None] * len(new_locations)
+        to_encode = [location for location, hit in zip(new_locations, cached) if hit is None]
+        new_encodings = list(cached)
+        t2 = t_encode
+        if to_encode:
+            # Get face encodings with optimized model (the landmark model only
+            # samples inside each box, so the box acts as a high-resolution crop)
+            face_encodings = iter(face_recognition.face_encodings(
                 rgb_frame, 
-                face_locations, 
-                model='small'  # Use small model for speed
-            )
-            
-            # Process each face
-            for face_encoding in face_encodings:
-                # Fast face comparison using vectorized operations
-                if len(known_face_encodings) > 0:
-                    # Calculate distances all at once
-                    face_distances = np.linalg.norm(known_face_encodings - face_encoding, axis=1)
-                    
-                    # Find best match
-                    best_match_index = np.argmin(face_distances)
-                    
-                    if face_distances[best_match_index] <= RECOGNITION_TOLERANCE:
-                        name = known_face_names[best_match_index]
-                    else:
-                        name = "Unknown"
-                else:
-                    name = "Unknown"
-                    
-                face_names.append(name)
+                to_encode, 
+                model=ENCODING_MODEL  # Small model for speed
+            ))
+            t2 = time.perf_counter()
+            for i, key in enumerate(keys):
+                if new_encodings[i] is None:
+                    new_encodings[i] = next(face_encodings)
+                    if ENCODING_CACHE:
+                        encoding_cache.put(key, new_encodings[i])
+            if ENCODING_CACHE:
+                encoding_cache.record_encode((t2 - t_encode) * 1000, len(to_encode))
+            if timings is not None:
+                timings["encode"] = (t2 - t_encode) * 1000
+        if new_encodings:
+            # Match all new faces, cached ones included, against the gallery in one batch
+            new_names = face_index.match(new_encodings, RECOGNITION_TOLERANCE)
+            if timings is not None:
+                timings["match"] = (time.perf_counter() - t2) * 1000
+        else:
+            new_names = []
+        new_names = iter(new_names)
+        face_names = [name if name is not None else next(new_names) for name in face_names]
+        
+        if timings is not None:
+            timings["detect"] = (t1 - t0) * 1000
+        
+        face_locations = [tuple(v * scale for v in location) for location in face_locations]
+        return face_locations, face_names, reused
+        
+    def recognize_frame(self, rgb_frame, submitted=None, **options):
+        """Worker entry point: recognize_faces plus its stage timings and the submit time"""
+        timings = {"submitted": submitted}
+        face_index.refresh()  # Pick up enrollments between frames
+        face_locations, face_names, reused = self.recognize_faces(rgb_frame, timings=timings, **options)
+        return face_locations, face_names, reused, timings
         
-        return face_locations, face_names
+    def detection_rois(self, track_lost, frame_shape):
+        """Regions around tracked faces to detect in, or None for a full-frame detection"""
+        if not ROI_DETECTION or track_lost or not self.tracker.tracks:
+            self.roi_detections = 0
+            return None
+        
+        # Every ROI_FULL_DETECT_EVERY-th detection still scans the whole frame for new faces
+        self.roi_detections += 1
+        if self.roi_detections >= ROI_FULL_DETECT_EVERY:
+            self.roi_detections = 0
+            return None
+        
+        height, width = frame_shape[:2]
+        rois = []
+        for top, right, bottom, left in self.tracker.results()[0]:
+            margin_y = (bottom - top) * ROI_MARGIN
+            margin_x = (right - left) * ROI_MARGIN
+            rois.append((
+                max(0, int((top - margin_y) / ENCODE_SCALE)),
+                min(width, int((right + margin_x) / ENCODE_SCALE)),
+                min(height, int((bottom + margin_y) / ENCODE_SCALE)),
+                max(0, int((left - margin_x) / ENCODE_SCALE)),
+            ))
+        return rois
         
     def process_video(self):
         """Process video frames with optimization"""
         try:
             while self.running:
-                # Capture frame
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("[ERROR] Failed to read frame. Retrying...")
+                # Take the newest frame from the capture thread
+                grabbed = self.grabber.read(timeout=FRAME_TIMEOUT)
+                if grabbed is None:
+                    if not self.running or self.grabber.stop_event.is_set():
+                        break  # Stopped by the user, not a camera failure
+                    if self.grabber.finished:
+                        # Only a file that reached its end finishes without stop()
+                        if self.grabber.ended:
+                            print("[INFO] Video source ended")
+                            if self.status_callback:
+                                self.status_callback("Video source ended")
+                        break
+                    
+                    # The grabber reconnects on its own with backoff
                     if self.status_callback:
                         self.status_callback("Camera error, retrying...")
-                    time.sleep(0.1)
-                    
-                    # Try to reconnect
-                    self.cap.release()
-                    if gpio_available:
-                        output.off()
-                    self.connect_camera()
+                    self.set_door(False)
                     continue
+                _, frame, _ = grabbed
+                
+                frame_start = time.perf_counter()
                 
                 # Calculate FPS
                 current_fps = self.calculate_fps()
+                self.metrics["fps"].set(current_fps)
                 
-                # Skip frames for performance
+                # Follow known faces with the cheap tracker and measure scene activity
                 self.frame_counter += 1
-                if self.frame_counter % SKIP_FRAMES == 0:
-                    # Prepare frame for processing
-                    small_frame = cv2.resize(frame, (0, 0), fx=1/cv_scaler, fy=1/cv_scaler)
-                    rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+                track_lost = self.tracker.update(frame)
+                self.motion_gate.update(frame)
+                
+                # Full detection runs every skip_frames frames while nobody is tracked,
+                # every TRACK_DETECT_EVERY frames while faces are tracked, and right
+                # away when a track is lost. With nobody tracked, the motion gate slows
+                # recognition down to a heartbeat while the scene is static.
+                detect_every = TRACK_DETECT_EVERY if self.tracker.tracks else self.skip_frames
+                detect_due = track_lost or self.frame_counter - self.last_submit_frame >= detect_every
+                if detect_due and (self.tracker.tracks or self.motion_gate.should_recognize()):
+                    # Prepare frame for processing: workers detect on a 1/cv_scaler copy
+                    # and encode from this 1/ENCODE_SCALE frame
+                    small_frame = frame
+                    if ENCODE_SCALE > 1:
+                        small_frame = cv2.resize(frame, (0, 0), fx=1/ENCODE_SCALE, fy=1/ENCODE_SCALE)
                     
-                    # Send to async processor if queue not full
-                    if not self.processing_queue.full():
-                        try:
-                            self.processing_queue.put_nowait(rgb_frame)
-                        except:
-                            pass
+                    # Convert straight into a shared-memory slot and hand it to the
+                    # workers, tagged with the frame number (the newest frame wins)
+                    if self.controller:
+                        self.controller.observe_backlog(self.pool.pending())
+                    reserved = self.pool.acquire(small_frame.shape, self.stream)
+                    if reserved:
+                        slot, rgb_frame = reserved
+                        cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+                        meta = {
+                            "scale": ENCODE_SCALE,
+                            "detect_scale": max(1, self.cv_scaler // ENCODE_SCALE),
+                            "max_faces": self.max_faces,
+                            "known_faces": self.tracker.known_faces(time.time(), ENCODE_SCALE),
+                            "rois": self.detection_rois(track_lost, small_frame.shape),
+                            "submitted": time.time(),
+                        }
+                        self.pool.publish(slot, self.frame_counter, rgb_frame.shape, meta, self.stream)
+                        self.last_submit_frame = self.frame_counter
+                        self.metrics["submitted"].inc()
                 
-                # Get results from async processor
-                if not self.result_queue.empty():
-                    try:
-                        self.last_face_locations, self.last_face_names = self.result_queue.get_nowait()
-                        self.face_tracking_buffer.append((self.last_face_locations, self.last_face_names))
-                        
-                        # Handle check-ins and GPIO
-                        self.handle_recognitions(frame)
-                    except:
-                        pass
+                # Apply finished results in frame order (stale ones are dropped by the pool)
+                for seq, (face_locations, face_names, reused, timings) in self.pool.get_results(self.stream):
+                    self.record_timings(timings, face_names)
+                    if self.controller and timings.get("submitted"):
+                        self.controller.observe_latency(time.time() - timings["submitted"])
+                    if self.first_recognition_time is None:
+                        self.report_startup()
+                    self.last_face_locations, self.last_face_names = face_locations, face_names
+                    self.tracker.apply_detections(face_locations, face_names, reused, time.time())
+                    self.motion_gate.record_recognition(face_names)
+                    
+                    # Handle check-ins and GPIO
+                    self.handle_recognitions(frame)
                 
-                # Use smoothed results for display
-                smooth_locations, smooth_names = self.get_smoothed_results()
+                # Shed or restore load based on the measured latency, backlog and temperature
+                if self.controller:
+                    self.apply_tuning(self.controller.update(tracking=bool(self.tracker.tracks)))
                 
-                # Draw results on the frame
-                display_frame = self.draw_results(frame, smooth_locations, smooth_names, current_fps)
+                # Draw the tracked faces on the frame
+                track_locations, track_names = self.tracker.results()
+                display_frame = self.draw_results(frame, track_locations, track_names, current_fps)
                 
                 # Display frame in UI
                 self.update_display(display_frame)
+                self.metrics["frames"].inc()
+                self.metrics["frame_seconds"].observe(time.perf_counter() - frame_start)
                 
         except Exception as e:
             print(f"[ERROR] Error in face recognition: {e}")
@@ -310,26 +679,49 @@ class OptimizedFaceRecognition:
         finally:
             self.cleanup()
     
-    def get_smoothed_results(self):
-        """Get smoothed face detection results"""
-        if not self.face_tracking_buffer:
-            return [], []
-            
-        # Use most recent result for simplicity
-        # You could implement more sophisticated smoothing here
-        return self.face_tracking_buffer[-1]
+    def apply_tuning(self, settings):
+        """Take over settings chosen by the load controller (skip_frames, cv_scaler, max_faces)"""
+        for knob, value in settings.items():
+            setattr(self, knob, value)
+    
+    def report_startup(self):
+        """Print how long the first recognition took after start"""
+        self.first_recognition_time = time.time()
+        elapsed = self.first_recognition_time - self.start_time
+        startup_seconds.set(elapsed)
+        print(f"[INFO] Startup: camera connected after {self.camera_time - self.start_time:.2f}s, "
+              f"{self.pool.ready_workers()}/{self.pool.workers} workers warm, "
+              f"first recognition after {elapsed:.2f}s")
+    
+    def record_timings(self, timings, face_names):
+        """Add the stage timings and outcome of a worker result to the metrics"""
+        self.metrics["recognitions"].inc()
+        detect_seconds.observe(timings.get("detect", 0) / 1000)
+        if "encode" in timings:
+            encode_seconds.observe(timings["encode"] / 1000)
+            match_seconds.observe(timings["match"] / 1000)
+        if timings.get("submitted"):
+            self.metrics["latency"].observe(time.time() - timings["submitted"])
+        if "cache_hits" in timings:
+            cache_hits.inc(timings["cache_hits"])
+            cache_misses.inc(timings["cache_misses"])
+            cache_saved_seconds.inc(timings["cache_saved"] / 1000)
+            cache_lookup_seconds.inc(timings["cache_lookup"] / 1000)
+        unknown = sum(1 for name in face_names if name == "Unknown")
+        unknown_faces_total.inc(unknown)
+        known_faces_total.inc(len(face_names) - unknown)
     
     def handle_recognitions(self, frame):
         """Handle recognized faces for check-ins and GPIO control"""
         current_time = time.time()
         authorized_face_detected = False
         
-        for name in self.last_face_names:
+        for box, name in zip(self.last_face_locations, self.last_face_names):
             if name in authorized_names:
                 authorized_face_detected = True
                 
                 # Show message if we haven't recently
-                if current_time - self.last_checkin_time > self.cooldown_period:
+                if current_time - self.last_checkin_time > self.cooldown_period and self.show_messages:
                     show_message_box(name, is_authorized=True)
                     self.last_checkin_time = current_time
             
@@ -339,46 +731,43 @@ class OptimizedFaceRecognition:
                 
                 now = datetime.now()
                 timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
-                filename = f"{name}_{now.strftime('%Y%m%d_%H%M%S')}.jpg"
-                filepath = os.path.join(IMG_FOLDER, filename)
+                filepath = image_path(name, now, self.camera_id, IMG_FOLDER)
                 
-                # Save image in thread to avoid blocking
-                threading.Thread(
-                    target=lambda: cv2.imwrite(filepath, frame),
-                    daemon=True
-                ).start()
-                
-                # Log check-in in thread
-                threading.Thread(
-                    target=self.log_checkin,
-                    args=(name, timestamp),
-                    daemon=True
-                ).start()
+                # Hand the face crop and log row to the background writer
+                self.writer.save_image(filepath, face_crop(frame, box), frame.copy() if SAVE_FULL_FRAME else None)
+                self.log_checkin(name, timestamp, filepath)
+                self.metrics["checkins"].inc()
                 
                 self.checkin_done = True
                 self.last_checkin_time = current_time
                 
-                if name not in authorized_names:
+                if name not in authorized_names and self.show_messages:
                     show_message_box(name)
                 
                 if self.status_callback:
                     self.status_callback(f"Check-in successful: {name}")
         
         # Control GPIO
+        self.set_door(authorized_face_detected)
+    
+    def set_door(self, authorized):
+        """Drive the door output (or report to the multi-camera owner) and count state changes"""
+        if self.on_door:
+            self.door_open = authorized
+            self.on_door(self, authorized)
+            return
+        if authorized != self.door_open:
+            self.door_open = authorized
+            gpio_toggles.inc()
         if gpio_available:
-            if authorized_face_detected:
+            if authorized:
                 output.on()
             else:
                 output.off()
     
-    def log_checkin(self, name, timestamp):
-        """Log check-in to CSV file"""
-        try:
-            with open(CHECKIN_FILE, mode="a", newline="") as file:
-                writer = csv.writer(file)
-                writer.writerow([name, timestamp])
-        except Exception as e:
-            print(f"Error logging check-in: {e}")
+    def log_checkin(self, name, timestamp, image=None):
+        """Queue a check-in row for the check-in store"""
+        self.writer.log(name, timestamp, image)
     
     def draw_results(self, frame, face_locations, face_names, fps):
         """Draw recognition results on the frame"""
@@ -390,17 +779,11 @@ class OptimizedFaceRecognition:
         cv2.putText(frame, f"Faces: {len(face_locations)}", (10, 30), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
         
-        cv2.putText(frame, f"Scale: 1/{cv_scaler}", (10, 60), 
+        cv2.putText(frame, f"Scale: 1/{self.cv_scaler}", (10, 60), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
         
         # Draw boxes and labels for each face
         for (top, right, bottom, left), name in zip(face_locations, face_names):
-            # Scale back up face locations
-            top *= cv_scaler
-            right *= cv_scaler
-            bottom *= cv_scaler
-            left *= cv_scaler
-            
             # Draw box around face
             box_color = (0, 255, 0) if name in authorized_names else (244, 42, 3)
             cv2.rectangle(frame, (left, top), (right, bottom), box_color, 3)
@@ -417,33 +800,15 @@ class OptimizedFaceRecognition:
         return frame
     
     def update_display(self, display_frame):
-        """Update the UI display with the frame"""
-        if self.video_label:
-            try:
-                # Convert to RGB
-                rgb_frame = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-                img = Image.fromarray(rgb_frame)
-                
-                # Resize for display
-                label_width = self.video_label.winfo_width()
-                label_height = self.video_label.winfo_height()
-                
-                if label_width > 1 and label_height > 1:
-                    img = img.resize((label_width, label_height), Image.LANCZOS)
-                
-                # Update display
-                imgtk = ImageTk.PhotoImage(image=img)
-                self.video_label.imgtk = imgtk
-                self.video_label.config(image=imgtk)
-            except Exception as e:
-                print(f"Display update error: {e}")
+        """Hand the frame to the renderer; it is drawn from the Tk main loop"""
+        if self.renderer:
+            self.renderer.publish(display_frame)
     
     def cleanup(self):
         """Clean up resources"""
-        if self.cap:
-            self.cap.release()
-        if gpio_available:
-            output.off()
+        if self.grabber:
+            self.grabber.stop()
+        self.set_door(False)
         self.running = False
 
 # Alias for backward compatibility
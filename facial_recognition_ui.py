@@ -1,22 +1,31 @@
 # facial_recognition_ui.py
+import time
+APP_START = time.time()  # For the startup timing report
+
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
+import queue
 import os
 import csv
-import pandas as pd
 import sys
+from datetime import datetime
 from PIL import Image, ImageTk
-import importlib.util
+import importlib
+from gallery import GALLERY_FILE
+from gallery_service import gallery_available
+from checkin_store import CheckinStore, DB_FILE, PAGE_SIZE, COUNT_LIMIT
 
-# Import our face recognition module
-spec = importlib.util.spec_from_file_location("facial_recognition", "facial_recognition.py")
-facial_recognition = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(facial_recognition)
+# Face recognition module, imported in the background once the window is shown
+facial_recognition = None
 
 # Configuration
 LOG_FILE = "checkin_log.csv"
 IMG_FOLDER = "checkin_images"
+LOG_POLL_MS = 2000       # Interval between checks for new check-ins
+STATUS_POLL_MS = 100     # Interval at which status messages from the processing thread are shown
+MAX_VISIBLE_ROWS = 500   # Rows kept in the log table; older/newer pages load while scrolling
+SCROLL_LOAD_MARGIN = 0.1 # Fraction of the scroll range from an edge that triggers a page load
 
 class CheckinApp:
     def __init__(self, root):
@@ -34,7 +43,29 @@ class CheckinApp:
                 writer = csv.writer(file)
                 writer.writerow(["Name", "Timestamp"])
 
+        # Check-in history store (the check-in writer imports an existing CSV log once)
+        self.store = CheckinStore(DB_FILE)
+        self.name_filter = ""
+        self.date_filter = ""
+
+        # Window of rows shown in the log table (newest first, keyed by store row id)
+        self.last_seen_id = 0      # Newest store row already checked for new check-ins
+        self.newest_key = None     # (timestamp, id) of the top row in the table
+        self.oldest_key = None     # (timestamp, id) of the bottom row in the table
+        self.following = True      # Table shows the newest rows, so new check-ins go on top
+        self.loading_rows = False
+
+        # Background loading of the recognition module and models
+        self.preload_thread = None
+        self.preload_error = None
+
+        # Status messages from the processing thread, shown from the Tk main loop
+        self.status_queue = queue.Queue()
+
         self.create_widgets()
+        self.root.after(LOG_POLL_MS, self.poll_logs)
+        self.root.after(STATUS_POLL_MS, self.poll_status)
+        self.root.bind("<Map>", self.on_window_shown)
         
         # Set up closing handler
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -110,7 +141,8 @@ class CheckinApp:
         scrollbar.pack(side="right", fill="y")
 
         # Configure treeview with scrollbar
-        self.tree = ttk.Treeview(tree_frame, columns=("name", "time"), show="headings", yscrollcommand=scrollbar.set)
+        self.scrollbar = scrollbar
+        self.tree = ttk.Treeview(tree_frame, columns=("name", "time"), show="headings", yscrollcommand=self.on_tree_scroll)
         self.tree.heading("name", text="Tên")
         self.tree.heading("time", text="Thời gian check-in")
         self.tree.column("name", width=150)
@@ -127,16 +159,71 @@ class CheckinApp:
         self.no_video_text.place(relx=0.5, rely=0.5, anchor="center")
 
     def update_status(self, message):
-        """Callback for the face recognition module to update status"""
-        self.status_var.set(message)
+        """Callback for the face recognition module (any thread); Tk is only touched in poll_status"""
+        self.status_queue.put(message)
+
+    def poll_status(self):
+        """Periodically show status messages from the processing thread"""
+        self.show_queued_status()
+        self.root.after(STATUS_POLL_MS, self.poll_status)
+
+    def show_queued_status(self):
+        """Show the newest queued status message and refresh the log after a check-in"""
+        message = None
+        checked_in = False
+        while True:
+            try:
+                message = self.status_queue.get_nowait()
+            except queue.Empty:
+                break
+            checked_in = checked_in or "Check-in successful" in message
+        if message is not None:
+            self.status_var.set(message)
         # If it's a check-in message, refresh the log
-        if "Check-in successful" in message:
-            self.root.after(500, self.show_logs)
+        if checked_in:
+            self.root.after(500, self.refresh_new_rows)
+
+    def on_window_shown(self, event):
+        """Report time-to-window and start loading the recognition module"""
+        if event.widget is not self.root or self.preload_thread:
+            return
+        self.root.unbind("<Map>")
+        print(f"[INFO] Startup: window shown after {time.time() - APP_START:.2f}s")
+        self.preload_thread = threading.Thread(target=self.preload_recognition, name="preload", daemon=True)
+        self.preload_thread.start()
+
+    def preload_recognition(self):
+        """Import facial_recognition, load the gallery and the dlib models off the UI thread"""
+        global facial_recognition
+        start = time.time()
+        try:
+            facial_recognition = importlib.import_module("facial_recognition")
+            if gallery_available():
+                facial_recognition.init_runtime()
+            # Loaded before the workers fork, so they share the models
+            facial_recognition.load_face_models()
+            print(f"[INFO] Startup: recognition ready {time.time() - APP_START:.2f}s after launch "
+                  f"(loading took {time.time() - start:.2f}s)")
+        except Exception as e:
+            self.preload_error = e
+            print(f"[ERROR] Loading face recognition failed: {e}")
 
     def start_checkin(self):
-        # Check if encodings file exists
-        if not os.path.exists("encodings.pickle"):
-            messagebox.showerror("Error", "encodings.pickle not found. Please create face encodings first.")
+        # Check if the face gallery exists
+        if not gallery_available():
+            messagebox.showerror("Error", f"{GALLERY_FILE} not found. Please create face encodings first.")
+            return
+        
+        # Wait for the background loading; workers must not fork while it runs
+        if self.preload_thread is None or self.preload_thread.is_alive():
+            self.status_var.set("Loading face recognition...")
+            self.root.update_idletasks()
+            if self.preload_thread is None:
+                self.preload_recognition()
+            else:
+                self.preload_thread.join()
+        if facial_recognition is None:
+            messagebox.showerror("Error", f"Failed to load face recognition: {self.preload_error}")
             return
         
         # Remove "no video" text
@@ -161,6 +248,7 @@ class CheckinApp:
         if self.face_rec:
             self.face_rec.stop()
             self.face_rec = None
+            self.show_queued_status()  # Messages sent before the stop must not replace the one below
             self.status_var.set("Check-in stopped")
             self.checkin_btn.config(state="normal")
             self.cancel_btn.config(state="disabled")
@@ -191,67 +279,158 @@ class CheckinApp:
 
     def open_pictures(self):
         if os.path.exists(IMG_FOLDER) and os.listdir(IMG_FOLDER):
+            # Images are kept in one folder per day: open today's if there is one
+            folder = os.path.join(IMG_FOLDER, datetime.now().strftime("%Y-%m-%d"))
+            if not os.path.isdir(folder):
+                folder = IMG_FOLDER
             # Use appropriate system command to open folder
             if sys.platform == "win32":
-                os.startfile(IMG_FOLDER)
+                os.startfile(folder)
             elif sys.platform == "darwin":
                 import subprocess
-                subprocess.run(["open", IMG_FOLDER])
+                subprocess.run(["open", folder])
             else:
                 try:
                     import subprocess
-                    subprocess.run(["xdg-open", IMG_FOLDER])
+                    subprocess.run(["xdg-open", folder])
                 except FileNotFoundError:
                     messagebox.showerror("Error", "Cannot open folder - xdg-open not found")
         else:
             messagebox.showwarning("Thông báo", "Chưa có ảnh nào được lưu.")
 
     def show_logs(self):
+        """Show the newest check-ins matching the current filter"""
         # Clear existing data
         self.tree.delete(*self.tree.get_children())
+        self.newest_key = None
+        self.oldest_key = None
+        self.following = True
         
-        if not os.path.exists(LOG_FILE):
+        try:
+            self.last_seen_id = self.store.last_id()
+            rows = self.store.query(self.name_filter, self.date_filter, limit=PAGE_SIZE)
+            self.append_rows(rows)
+            self.tree.yview_moveto(0)
+            return rows
+        except Exception as e:
+            messagebox.showerror("Lỗi", f"Lỗi khi đọc dữ liệu check-in: {str(e)}")
+            return []
+
+    def insert_row(self, row, index):
+        """Insert one (id, name, timestamp, image) row, using the store id as item id"""
+        row_id, name, timestamp, _ = row
+        if not self.tree.exists(str(row_id)):
+            self.tree.insert("", index, iid=str(row_id), values=(name, timestamp))
+
+    def append_rows(self, rows):
+        """Add older rows (newest first) at the bottom of the table"""
+        for row in rows:
+            self.insert_row(row, "end")
+        if rows:
+            self.oldest_key = (rows[-1][2], rows[-1][0])
+            if self.newest_key is None:
+                self.newest_key = (rows[0][2], rows[0][0])
+
+    def prepend_rows(self, rows):
+        """Add newer rows (oldest first) at the top of the table"""
+        for row in rows:
+            self.insert_row(row, 0)
+        if rows:
+            self.newest_key = (rows[-1][2], rows[-1][0])
+            if self.oldest_key is None:
+                self.oldest_key = (rows[0][2], rows[0][0])
+
+    def trim_rows(self, from_top):
+        """Drop rows beyond MAX_VISIBLE_ROWS from one end and update the window bounds"""
+        children = self.tree.get_children()
+        excess = len(children) - MAX_VISIBLE_ROWS
+        if excess <= 0:
             return
-            
+        if from_top:
+            self.tree.delete(*children[:excess])
+            item = children[excess]
+            self.newest_key = (self.tree.set(item, "time"), int(item))
+        else:
+            self.tree.delete(*children[-excess:])
+            item = children[-excess - 1]
+            self.oldest_key = (self.tree.set(item, "time"), int(item))
+
+    def refresh_new_rows(self):
+        """Fetch only the check-ins added since the last refresh"""
+        try:
+            newest_id = self.store.last_id()
+            if newest_id <= self.last_seen_id:
+                return
+            rows = self.store.query_since(self.last_seen_id, self.name_filter, self.date_filter, limit=PAGE_SIZE)
+            if len(rows) < PAGE_SIZE:
+                self.last_seen_id = max(newest_id, rows[-1][0] if rows else 0)
+            else:
+                self.last_seen_id = rows[-1][0]  # More pending; the next poll continues from here
+            if self.following and rows:
+                # Keep the view on the row the user is looking at when it is not at the top
+                first, _ = self.tree.yview()
+                anchor = self.tree.get_children()[0] if first > 0 and self.tree.get_children() else None
+                self.prepend_rows(sorted(rows, key=lambda row: (row[2], row[0])))
+                self.trim_rows(from_top=False)
+                if anchor and self.tree.exists(anchor):
+                    self.tree.see(anchor)
+        except Exception as e:
+            print(f"Error refreshing check-in log: {e}")
+
+    def poll_logs(self):
+        """Periodically add new check-ins to the table"""
+        self.refresh_new_rows()
+        self.root.after(LOG_POLL_MS, self.poll_logs)
+
+    def on_tree_scroll(self, first, last):
+        """Scrollbar update hook: load the next page when the view nears either edge"""
+        self.scrollbar.set(first, last)
+        if not self.loading_rows:
+            self.loading_rows = True
+            self.root.after_idle(self.load_visible_pages, float(first), float(last))
+
+    def load_visible_pages(self, first, last):
+        """Load older rows near the bottom or newer rows near the top of the table"""
         try:
-            # Read and display all log entries
-            with open(LOG_FILE, "r") as file:
-                reader = csv.reader(file)
-                next(reader, None)  # Skip header
-                for row in reader:
-                    if len(row) >= 2:
-                        self.tree.insert("", "end", values=(row[0], row[1]))
+            if last >= 1 - SCROLL_LOAD_MARGIN and self.oldest_key is not None:
+                rows = self.store.query(self.name_filter, self.date_filter, limit=PAGE_SIZE, before=self.oldest_key)
+                if rows:
+                    anchor = self.tree.get_children()[-1]
+                    self.append_rows(rows)
+                    if len(self.tree.get_children()) > MAX_VISIBLE_ROWS:
+                        self.trim_rows(from_top=True)
+                        self.following = False
+                    self.tree.see(anchor)
+            elif first <= SCROLL_LOAD_MARGIN and not self.following and self.newest_key is not None:
+                rows = self.store.query(self.name_filter, self.date_filter, limit=PAGE_SIZE, after=self.newest_key)
+                if rows:
+                    anchor = self.tree.get_children()[0]
+                    self.prepend_rows(rows)
+                    self.trim_rows(from_top=False)
+                    self.tree.see(anchor)
+                if len(rows) < PAGE_SIZE:
+                    self.following = True
         except Exception as e:
-            messagebox.showerror("Lỗi", f"Lỗi khi đọc file CSV: {str(e)}")
+            print(f"Error loading check-in log page: {e}")
+        finally:
+            self.loading_rows = False
 
     def filter_log(self):
-        if not os.path.exists(LOG_FILE):
-            messagebox.showwarning("Không có dữ liệu", "Chưa có log check-in.")
-            return
-            
         try:
-            name = self.name_entry.get().strip().lower()
-            date = self.date_entry.get().strip()
-            
-            df = pd.read_csv(LOG_FILE)
-            filtered_df = df.copy()
-            
-            # Apply filters
-            if name:
-                filtered_df = filtered_df[filtered_df["Name"].str.lower().str.contains(name)]
-            if date:
-                filtered_df = filtered_df[filtered_df["Timestamp"].str.startswith(date)]
+            self.name_filter = self.name_entry.get().strip()
+            self.date_filter = self.date_entry.get().strip()
             
-            # Update treeview
-            self.tree.delete(*self.tree.get_children())
-            for _, row in filtered_df.iterrows():
-                self.tree.insert("", "end", values=(row["Name"], row["Timestamp"]))
+            # Indexed query for the first page only
+            self.show_logs()
+            total = self.store.count(self.name_filter, self.date_filter)
                 
             # Show count of filtered records
-            if len(filtered_df) == 0:
+            if total == 0:
                 self.status_var.set(f"No records match your filter")
+            elif total >= COUNT_LIMIT:
+                self.status_var.set(f"Found {COUNT_LIMIT}+ matching records (showing newest {PAGE_SIZE})")
             else:
-                self.status_var.set(f"Found {len(filtered_df)} matching records")
+                self.status_var.set(f"Found {total} matching records")
                 
         except Exception as e:
             messagebox.showerror("Error", f"Filter error: {str(e)}")
@@ -259,6 +438,8 @@ class CheckinApp:
     def reset_filter(self):
         self.name_entry.delete(0, tk.END)
         self.date_entry.delete(0, tk.END)
+        self.name_filter = ""
+        self.date_filter = ""
         self.show_logs()
         self.status_var.set("Filter reset")
         
@@ -266,6 +447,7 @@ class CheckinApp:
         """Handle window closing event"""
         if self.face_rec:
             self.face_rec.stop()
+        self.store.close()
         self.root.destroy()
 
 if __name__ == "__main__":
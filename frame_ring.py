@@ -0,0 +1,162 @@
+import pickle
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+
+# Configuration
+META_BYTES = 4096  # Space reserved per slot for pickled per-frame metadata
+
+# Slot states
+FREE = 0      # Empty, can be written
+WRITING = 1   # Being filled by the producer
+READY = 2     # Holds a frame waiting for a worker
+BUSY = 3      # Being processed by a worker
+
+class FrameLease:
+    """A frame handed to a worker; the frame is a view into shared memory valid until release"""
+    def __init__(self, slot, seq, frame, meta, stream=0):
+        self.slot = slot
+        self.stream = stream
+        self.seq = seq
+        self.frame = frame
+        self.meta = meta
+
+class FrameRing:
+    """Fixed ring of shared-memory frame slots with latest-frame-wins hand-off between processes
+
+    The producer writes frames straight into a free slot and publishes them; workers block
+    on a condition until a frame is ready and always take the newest one. Older frames still
+    waiting when a new one is published are dropped.
+
+    Several producers (cameras) can share the ring, each publishing to its own stream.
+    Latest-frame-wins then applies per stream, and workers serve the streams with a waiting
+    frame in turn, so a busy stream cannot starve the others.
+    """
+    def __init__(self, slots, slot_bytes, streams=1):
+        self.slots = slots
+        self.streams = streams
+        self.slot_bytes = slot_bytes
+        self.slot_size = META_BYTES + slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_size)
+
+        # Slot bookkeeping shared with the workers, guarded by the condition's lock
+        self.cond = multiprocessing.Condition(multiprocessing.Lock())
+        self.state = multiprocessing.RawArray("i", slots)
+        self.seq = multiprocessing.RawArray("q", slots)
+        self.stream = multiprocessing.RawArray("i", slots)
+        self.next_stream = multiprocessing.RawValue("i", 0)  # Stream served first by the next get
+        self.shape = multiprocessing.RawArray("i", slots * 4)  # ndim followed by up to 3 dims
+        self.meta_length = multiprocessing.RawArray("i", slots)
+        self.closed = multiprocessing.RawValue("b", 0)
+        self.dropped = multiprocessing.RawValue("q", 0)  # Frames replaced before any worker took them
+
+    def slot_view(self, slot, shape):
+        """Return an ndarray view of a slot's frame area"""
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf,
+                          offset=slot * self.slot_size + META_BYTES)
+
+    def acquire(self, shape, stream=0):
+        """Reserve a slot for writing a frame of the given shape; return (slot, view) or None if all are busy
+
+        With no free slot, the oldest frame still waiting in the same stream is replaced;
+        frames of other streams are never taken.
+        """
+        if int(np.prod(shape)) > self.slot_bytes:
+            raise ValueError(f"Frame of shape {shape} does not fit in a {self.slot_bytes}-byte slot")
+
+        with self.cond:
+            slot = None
+            oldest = None
+            for i in range(self.slots):
+                if self.state[i] == FREE:
+                    slot = i
+                    break
+                if (self.state[i] == READY and self.stream[i] == stream
+                        and (oldest is None or self.seq[i] < self.seq[oldest])):
+                    oldest = i
+            if slot is None:
+                if oldest is None:
+                    return None
+                # Reuse the oldest waiting frame's slot
+                slot = oldest
+                self.dropped.value += 1
+            self.state[slot] = WRITING
+
+        return slot, self.slot_view(slot, shape)
+
+    def publish(self, slot, seq, shape, meta=None, stream=0):
+        """Mark a written slot as ready and wake one waiting worker"""
+        meta_blob = pickle.dumps(meta) if meta else b""
+        if len(meta_blob) > META_BYTES:
+            raise ValueError(f"Frame metadata is {len(meta_blob)} bytes, limit is {META_BYTES}")
+        start = slot * self.slot_size
+        self.shm.buf[start:start + len(meta_blob)] = meta_blob
+
+        with self.cond:
+            # Latest frame wins: drop frames of this stream that are still waiting
+            for i in range(self.slots):
+                if self.state[i] == READY and self.stream[i] == stream:
+                    self.state[i] = FREE
+                    self.dropped.value += 1
+            self.seq[slot] = seq
+            self.stream[slot] = stream
+            self.shape[slot * 4:slot * 4 + 4] = [len(shape)] + list(shape) + [0] * (3 - len(shape))
+            self.meta_length[slot] = len(meta_blob)
+            self.state[slot] = READY
+            self.cond.notify()
+
+    def put(self, seq, frame, meta=None, stream=0):
+        """Copy a frame into the ring; return False if every slot is being processed"""
+        reserved = self.acquire(frame.shape, stream)
+        if reserved is None:
+            return False
+        slot, view = reserved
+        np.copyto(view, frame)
+        self.publish(slot, seq, frame.shape, meta, stream)
+        return True
+
+    def get(self, timeout=None):
+        """Block until a frame is ready and lease the newest one of the next stream in turn; return None on close or timeout"""
+        with self.cond:
+            ready = lambda: self.closed.value or any(self.state[i] == READY for i in range(self.slots))
+            if not self.cond.wait_for(ready, timeout) or self.closed.value:
+                return None
+            waiting = [i for i in range(self.slots) if self.state[i] == READY]
+            # Round robin: the first stream at or after next_stream that has a frame waiting
+            first = self.next_stream.value
+            stream = min((self.stream[i] for i in waiting), key=lambda s: (s - first) % self.streams)
+            slot = max((i for i in waiting if self.stream[i] == stream), key=lambda i: self.seq[i])
+            self.next_stream.value = (stream + 1) % self.streams
+            self.state[slot] = BUSY
+            seq = self.seq[slot]
+            ndim = self.shape[slot * 4]
+            shape = tuple(self.shape[slot * 4 + 1:slot * 4 + 1 + ndim])
+            meta_length = self.meta_length[slot]
+
+        start = slot * self.slot_size
+        meta = pickle.loads(bytes(self.shm.buf[start:start + meta_length])) if meta_length else {}
+        return FrameLease(slot, seq, self.slot_view(slot, shape), meta, stream)
+
+    def pending(self):
+        """Number of frames waiting for a worker (unlocked read, for monitoring)"""
+        return sum(1 for i in range(self.slots) if self.state[i] == READY)
+
+    def release(self, lease):
+        """Return a leased slot to the ring"""
+        lease.frame = None
+        with self.cond:
+            self.state[lease.slot] = FREE
+
+    def close(self):
+        """Wake every waiting worker and make further gets return None"""
+        with self.cond:
+            self.closed.value = 1
+            self.cond.notify_all()
+
+    def destroy(self):
+        """Release the shared memory block (owner process only)"""
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A frame view is still referenced; the mapping goes away with the process
+        self.shm.unlink()
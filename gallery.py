@@ -0,0 +1,120 @@
+import os
+import json
+import struct
+import pickle
+import numpy as np
+
+# Configuration
+GALLERY_FILE = "encodings.gallery"
+LEGACY_PICKLE = "encodings.pickle"  # Output of older model_training.py versions
+
+# On-disk layout (little endian):
+#   64-byte header | float32 encodings (count x dim) | int32 labels (count) | UTF-8 JSON names
+# The encodings matrix starts at a fixed offset so it can be memory-mapped directly.
+GALLERY_MAGIC = b"FRGALLRY"
+GALLERY_VERSION = 1
+HEADER_FORMAT = "<8sIIIQQQ"  # magic, version, dim, count, labels offset, names offset, names length
+HEADER_SIZE = 64
+ENCODING_DIM = 128
+
+class Gallery:
+    """Read-only face gallery: an (N, dim) float32 matrix plus a name/label index"""
+    def __init__(self, encodings, labels, names, path=None):
+        self.encodings = encodings  # (N, dim) float32, usually a read-only memmap
+        self.labels = labels        # (N,) int32, index into names
+        self.names = names          # Unique person names
+        self.path = path
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def dim(self):
+        return self.encodings.shape[1]
+
+    def name_of(self, index):
+        """Return the person name for an encoding row"""
+        return self.names[self.labels[index]]
+
+def gallery_exists(path=GALLERY_FILE, legacy_path=LEGACY_PICKLE):
+    """Check whether a gallery (or a legacy pickle that can be converted) is available"""
+    return os.path.exists(path) or os.path.exists(legacy_path)
+
+def label_rows(row_names):
+    """Turn per-row names into int32 labels plus the unique names, in order of first appearance"""
+    names = []
+    name_ids = {}
+    labels = np.empty(len(row_names), dtype=np.int32)
+    for i, name in enumerate(row_names):
+        if name not in name_ids:
+            name_ids[name] = len(names)
+            names.append(name)
+        labels[i] = name_ids[name]
+    return labels, names
+
+def make_gallery(encodings, row_names):
+    """In-memory gallery from encodings and their per-row names"""
+    labels, names = label_rows(row_names)
+    return Gallery(np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM), labels, names)
+
+def save_gallery(encodings, row_names, path=GALLERY_FILE):
+    """Write encodings and their per-row names as a gallery file, replacing it atomically"""
+    matrix = np.ascontiguousarray(np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM))
+    if len(matrix) != len(row_names):
+        raise ValueError(f"{len(matrix)} encodings but {len(row_names)} names")
+
+    labels, names = label_rows(row_names)
+    names_blob = json.dumps({"names": names}, ensure_ascii=False).encode("utf-8")
+    labels_offset = HEADER_SIZE + matrix.nbytes
+    names_offset = labels_offset + labels.nbytes
+    header = struct.pack(HEADER_FORMAT, GALLERY_MAGIC, GALLERY_VERSION, matrix.shape[1], len(matrix),
+                         labels_offset, names_offset, len(names_blob))
+
+    # Write to a temporary file and rename, so readers never see a partial gallery
+    # and processes that still map the old file keep a valid view of it
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        f.write(matrix.tobytes())
+        f.write(labels.tobytes())
+        f.write(names_blob)
+    os.replace(tmp_path, path)
+
+def load_gallery(path=GALLERY_FILE):
+    """Memory-map a gallery file without copying the encodings"""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"{path} is not a gallery file")
+        (magic, version, dim, count,
+         labels_offset, names_offset, names_length) = struct.unpack_from(HEADER_FORMAT, header)
+        if magic != GALLERY_MAGIC:
+            raise ValueError(f"{path} is not a gallery file")
+        if version != GALLERY_VERSION:
+            raise ValueError(f"Unsupported gallery version {version} in {path}")
+        f.seek(names_offset)
+        names = json.loads(f.read(names_length).decode("utf-8"))["names"]
+
+    if count == 0:
+        encodings = np.empty((0, dim), dtype=np.float32)
+        labels = np.empty(0, dtype=np.int32)
+    else:
+        encodings = np.memmap(path, dtype=np.float32, mode="r", offset=HEADER_SIZE, shape=(count, dim))
+        labels = np.memmap(path, dtype=np.int32, mode="r", offset=labels_offset, shape=(count,))
+    return Gallery(encodings, labels, names, path=path)
+
+def convert_pickle(pickle_path=LEGACY_PICKLE, path=GALLERY_FILE):
+    """Convert a legacy encodings.pickle into a gallery file"""
+    with open(pickle_path, "rb") as f:
+        data = pickle.loads(f.read())
+    save_gallery(data["encodings"], data["names"], path)
+    print(f"[INFO] Converted {len(data['names'])} encodings from '{pickle_path}' to '{path}'")
+
+def open_gallery(path=GALLERY_FILE, legacy_path=LEGACY_PICKLE):
+    """Load the gallery, converting a legacy pickle once if no gallery exists yet"""
+    if not os.path.exists(path) and os.path.exists(legacy_path):
+        convert_pickle(legacy_path, path)
+    return load_gallery(path)
+
+if __name__ == "__main__":
+    convert_pickle()
@@ -0,0 +1,149 @@
+import numpy as np
+
+# Configuration
+INDEX_KIND = "exact"     # "exact" or "cluster"
+N_PROBE = 8              # Number of coarse lists reranked by the cluster index
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_SIZE = 20000
+SEARCH_CHUNK_ROWS = 4096  # Rows per block when computing large distance matrices
+
+def squared_norms(matrix):
+    """Return the squared L2 norm of each row"""
+    return np.einsum("ij,ij->i", matrix, matrix)
+
+def nearest_rows(queries, data, data_norms=None):
+    """Return the index and squared distance of the nearest data row for each query"""
+    if data_norms is None:
+        data_norms = squared_norms(data)
+    best_rows = np.empty(len(queries), dtype=np.int64)
+    best_sq = np.empty(len(queries), dtype=np.float32)
+
+    # Process queries in blocks to keep the distance matrix small
+    for start in range(0, len(queries), SEARCH_CHUNK_ROWS):
+        block = queries[start:start + SEARCH_CHUNK_ROWS]
+        sq = data_norms[None, :] - 2.0 * (block @ data.T)
+        rows = np.argmin(sq, axis=1)
+        best_rows[start:start + len(block)] = rows
+        best_sq[start:start + len(block)] = sq[np.arange(len(block)), rows] + squared_norms(block)
+    return best_rows, np.maximum(best_sq, 0.0)
+
+def kmeans(data, k, iterations=KMEANS_ITERATIONS, sample_size=KMEANS_SAMPLE_SIZE, seed=0):
+    """Cluster rows with Lloyd's algorithm on a random sample and return the centroids"""
+    rng = np.random.default_rng(seed)
+    if len(data) > sample_size:
+        sample = np.asarray(data[np.sort(rng.choice(len(data), sample_size, replace=False))])
+    else:
+        sample = np.asarray(data)
+    k = min(k, len(sample))
+    centroids = sample[rng.choice(len(sample), k, replace=False)].astype(np.float32)
+
+    for _ in range(iterations):
+        assign, _ = nearest_rows(sample, centroids)
+        counts = np.bincount(assign, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+class ExactIndex:
+    """Brute-force gallery search with precomputed norms, batched over all query faces"""
+    def __init__(self, gallery):
+        self.gallery = gallery
+        self.encodings = np.asarray(gallery.encodings, dtype=np.float32)  # No copy for a float32 memmap
+        self.norms = squared_norms(self.encodings)
+
+    def __len__(self):
+        return len(self.encodings)
+
+    def search(self, queries, norms=None):
+        """Return the nearest gallery row and its distance for each query encoding
+
+        norms replaces the precomputed row norms; rows whose norm is +inf are never returned.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.encodings.shape[1])
+        if len(self) == 0 or len(queries) == 0:
+            return np.full(len(queries), -1, dtype=np.int64), np.full(len(queries), np.inf, dtype=np.float32)
+        rows, sq = nearest_rows(queries, self.encodings, self.norms if norms is None else norms)
+        return np.where(np.isfinite(sq), rows, -1), np.sqrt(sq)
+
+    def match(self, queries, tolerance, unknown="Unknown"):
+        """Return the best matching name for each query, or unknown if none is within tolerance"""
+        rows, distances = self.search(queries)
+        return [self.gallery.name_of(row) if row >= 0 and distance <= tolerance else unknown
+                for row, distance in zip(rows, distances)]
+
+class ClusterIndex(ExactIndex):
+    """Approximate search: narrow candidates to the nearest coarse lists, then rerank exactly
+
+    Small galleries use one list per person (its centroid); large ones use k-means clusters.
+    """
+    def __init__(self, gallery, n_lists=None, n_probe=N_PROBE):
+        super().__init__(gallery)
+        self.n_probe = n_probe
+        if len(self) == 0:
+            self.centroids = np.empty((0, self.encodings.shape[1]), dtype=np.float32)
+            self.list_rows = np.empty(0, dtype=np.int64)
+            self.list_starts = np.zeros(1, dtype=np.int64)
+            return
+
+        if n_lists is None:
+            n_lists = max(1, int(4 * np.sqrt(len(self))))
+        labels = np.asarray(gallery.labels)
+        n_people = len(gallery.names)
+
+        if n_people <= n_lists:
+            # One list per person, represented by the mean of their encodings
+            assign = labels.astype(np.int64)
+            counts = np.bincount(assign, minlength=n_people)
+            sums = np.zeros((n_people, self.encodings.shape[1]), dtype=np.float32)
+            np.add.at(sums, assign, self.encodings)
+            self.centroids = sums / np.maximum(counts, 1)[:, None]
+        else:
+            self.centroids = kmeans(self.encodings, n_lists)
+            assign, _ = nearest_rows(self.encodings, self.centroids)
+
+        # Store the inverted lists as one row array plus offsets
+        counts = np.bincount(assign, minlength=len(self.centroids))
+        self.list_rows = np.argsort(assign, kind="stable")
+        self.list_starts = np.concatenate(([0], np.cumsum(counts)))
+        self.centroid_norms = squared_norms(self.centroids)
+
+    def search(self, queries, norms=None):
+        """Return the (approximately) nearest gallery row and its distance for each query encoding"""
+        norms = self.norms if norms is None else norms
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.encodings.shape[1])
+        rows = np.full(len(queries), -1, dtype=np.int64)
+        distances = np.full(len(queries), np.inf, dtype=np.float32)
+        if len(self) == 0 or len(queries) == 0:
+            return rows, distances
+
+        # Pick the closest lists for every query in one batch
+        list_sq = self.centroid_norms[None, :] - 2.0 * (queries @ self.centroids.T)
+        n_probe = min(self.n_probe, len(self.centroids))
+        probes = np.argpartition(list_sq, n_probe - 1, axis=1)[:, :n_probe]
+
+        # Rerank the candidate rows exactly
+        for i, query in enumerate(queries):
+            candidates = np.concatenate([self.list_rows[self.list_starts[l]:self.list_starts[l + 1]]
+                                         for l in probes[i]])
+            if len(candidates) == 0:
+                continue
+            sq = norms[candidates] - 2.0 * (self.encodings[candidates] @ query)
+            best = np.argmin(sq)
+            if not np.isfinite(sq[best]):
+                continue
+            rows[i] = candidates[best]
+            distances[i] = np.sqrt(max(sq[best] + float(query @ query), 0.0))
+        return rows, distances
+
+INDEX_TYPES = {
+    "exact": ExactIndex,
+    "cluster": ClusterIndex,
+}
+
+def build_index(gallery, kind=INDEX_KIND):
+    """Build a search index of the given kind over a gallery"""
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index kind '{kind}', expected one of {sorted(INDEX_TYPES)}")
+    return INDEX_TYPES[kind](gallery)
@@ -0,0 +1,130 @@
+import os
+import time
+import argparse
+import numpy as np
+from gallery import GALLERY_FILE, ENCODING_DIM, load_gallery, make_gallery, save_gallery
+from gallery_index import ExactIndex, kmeans, squared_norms
+
+# Configuration
+PROTOTYPES_PER_PERSON = 3    # Representative encodings kept per person
+DUPLICATE_DISTANCE = 0.15    # Encodings closer than this to a kept one are redundant
+HOLDOUT_FRACTION = 0.25      # Share of each person's encodings held out for evaluation
+TOLERANCE = 0.6              # Match tolerance used in the evaluation, as in facial_recognition.py
+LEVELS = [1, 2, 3, 5]        # Prototype counts compared by the evaluation
+
+def drop_duplicates(encodings, distance=DUPLICATE_DISTANCE):
+    """Keep an encoding only if it is farther than distance from every encoding kept before it"""
+    kept = []
+    for encoding in encodings:
+        if not kept or np.min(np.linalg.norm(np.array(kept) - encoding, axis=1)) > distance:
+            kept.append(encoding)
+    return np.array(kept, dtype=np.float32).reshape(-1, ENCODING_DIM)
+
+def person_prototypes(encodings, count=PROTOTYPES_PER_PERSON, distance=DUPLICATE_DISTANCE):
+    """Cluster one person's encodings into at most count prototypes (cluster means)"""
+    unique = drop_duplicates(encodings, distance)
+    if len(unique) <= count:
+        return unique
+    centroids = kmeans(unique, count)
+    # Drop clusters that ended up without members
+    assign = np.argmin(squared_norms(centroids)[None, :] - 2.0 * (unique @ centroids.T), axis=1)
+    return centroids[np.unique(assign)]
+
+def build_prototypes(encodings, row_names, count=PROTOTYPES_PER_PERSON, distance=DUPLICATE_DISTANCE):
+    """Replace each person's encodings by a few prototypes; return (encodings, row names)"""
+    encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    rows_by_name = {}
+    for i, name in enumerate(row_names):
+        rows_by_name.setdefault(name, []).append(i)
+
+    prototypes = []
+    prototype_names = []
+    for name, rows in rows_by_name.items():
+        person = person_prototypes(encodings[rows], count, distance)
+        prototypes.append(person)
+        prototype_names.extend([name] * len(person))
+    matrix = np.concatenate(prototypes) if prototypes else np.empty((0, ENCODING_DIM), dtype=np.float32)
+    return matrix, prototype_names
+
+def holdout_split(row_names, fraction=HOLDOUT_FRACTION, seed=0):
+    """Split row indices per person into train and held-out sets (people with one row stay in train)"""
+    rng = np.random.default_rng(seed)
+    rows_by_name = {}
+    for i, name in enumerate(row_names):
+        rows_by_name.setdefault(name, []).append(i)
+    train, test = [], []
+    for rows in rows_by_name.values():
+        rows = rng.permutation(rows)
+        held = int(round(len(rows) * fraction)) if len(rows) > 1 else 0
+        held = min(max(held, 1 if len(rows) > 1 else 0), len(rows) - 1)
+        test.extend(rows[:held])
+        train.extend(rows[held:])
+    return np.array(sorted(train), dtype=np.int64), np.array(sorted(test), dtype=np.int64)
+
+def accuracy(encodings, row_names, queries, query_names, tolerance=TOLERANCE):
+    """Share of queries matched to the right person, and matching time per query in ms"""
+    index = ExactIndex(make_gallery(encodings, row_names))
+    start = time.perf_counter()
+    matched = index.match(queries, tolerance)
+    elapsed = (time.perf_counter() - start) * 1000
+    correct = sum(1 for name, truth in zip(matched, query_names) if name == truth)
+    return correct / max(len(query_names), 1), elapsed / max(len(query_names), 1)
+
+def evaluate(encodings, row_names, levels=LEVELS, distance=DUPLICATE_DISTANCE, tolerance=TOLERANCE):
+    """Compare the full gallery with prototype galleries on a held-out split"""
+    encodings = np.asarray(encodings, dtype=np.float32)
+    row_names = list(row_names)
+    train, test = holdout_split(row_names)
+    train_encodings = encodings[train]
+    train_names = [row_names[i] for i in train]
+    queries = encodings[test]
+    query_names = [row_names[i] for i in test]
+
+    results = []
+    full_accuracy, full_ms = accuracy(train_encodings, train_names, queries, query_names, tolerance)
+    results.append({"level": "full", "rows": len(train), "accuracy": full_accuracy, "match_ms": full_ms})
+    for count in levels:
+        proto_encodings, proto_names = build_prototypes(train_encodings, train_names, count, distance)
+        level_accuracy, level_ms = accuracy(proto_encodings, proto_names, queries, query_names, tolerance)
+        results.append({"level": count, "rows": len(proto_names), "accuracy": level_accuracy, "match_ms": level_ms})
+    return results, len(test)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the gallery into a few prototypes per person")
+    parser.add_argument("--gallery", default=GALLERY_FILE)
+    parser.add_argument("--levels", type=int, nargs="+", default=LEVELS,
+                        help="prototype counts per person to evaluate")
+    parser.add_argument("--apply", type=int, metavar="COUNT",
+                        help="write the gallery compacted to COUNT prototypes per person")
+    parser.add_argument("--output", help="file written by --apply (default: replace --gallery)")
+    parser.add_argument("--duplicate-distance", type=float, default=DUPLICATE_DISTANCE)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.gallery):
+        print(f"[ERROR] {args.gallery} not found. Run model_training.py first.")
+        return
+    gallery = load_gallery(args.gallery)
+    encodings = np.asarray(gallery.encodings)
+    row_names = [gallery.name_of(i) for i in range(len(gallery))]
+    print(f"[INFO] {len(row_names)} encodings for {len(gallery.names)} people")
+
+    if args.apply:
+        proto_encodings, proto_names = build_prototypes(encodings, row_names, args.apply, args.duplicate_distance)
+        output = args.output or args.gallery
+        save_gallery(proto_encodings, proto_names, output)
+        print(f"[INFO] Saved {len(proto_names)} prototypes to '{output}' "
+              f"({len(proto_names) / max(len(row_names), 1):.0%} of {len(row_names)} rows, "
+              f"{proto_encodings.nbytes / 1024:.0f} KB instead of {encodings.nbytes / 1024:.0f} KB)")
+        return
+
+    results, held_out = evaluate(encodings, row_names, args.levels, args.duplicate_distance)
+    print(f"[INFO] Held-out evaluation on {held_out} encodings")
+    full_rows = results[0]["rows"]
+    for result in results:
+        label = "full" if result["level"] == "full" else f"{result['level']} per person"
+        print(f"  {label:<14} rows {result['rows']:7d} ({result['rows'] / max(full_rows, 1):6.1%})  "
+              f"accuracy {result['accuracy']:6.1%} ({result['accuracy'] - results[0]['accuracy']:+.1%})  "
+              f"match {result['match_ms'] * 1000:7.1f} us/face")
+
+if __name__ == "__main__":
+    main()
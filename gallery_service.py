@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+from gallery import GALLERY_FILE, LEGACY_PICKLE, ENCODING_DIM, Gallery, open_gallery, save_gallery
+from gallery_index import INDEX_KIND, build_index, squared_norms, nearest_rows
+
+# Configuration
+JOURNAL_FILE = "encodings.journal"  # Enrollment changes applied on top of the gallery file
+RELOAD_CHECK_INTERVAL = 0.5         # Seconds between checks of the gallery and journal files
+
+# The journal is an append-only file of JSON lines, one change per line:
+#   {"op": "add", "name": "...", "encodings": [[128 floats], ...]}
+#   {"op": "remove", "name": "..."}
+# Readers only consume complete lines, so a change is picked up whole or not at all.
+
+def gallery_available(path=GALLERY_FILE, journal_path=JOURNAL_FILE, legacy_path=LEGACY_PICKLE):
+    """Check whether a gallery file, a legacy pickle or enrolled changes exist"""
+    return os.path.exists(path) or os.path.exists(legacy_path) or os.path.exists(journal_path)
+
+def append_records(records, journal_path=JOURNAL_FILE):
+    """Append changes to the journal in one write and fsync it"""
+    data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+    with open(journal_path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+def add_person(name, encodings, journal_path=JOURNAL_FILE):
+    """Enroll encodings for a person; running recognizers pick them up without a restart"""
+    matrix = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    if len(matrix) == 0:
+        raise ValueError(f"No encodings to enroll for {name}")
+    append_records([{"op": "add", "name": name, "encodings": matrix.tolist()}], journal_path)
+    return len(matrix)
+
+def reset_journal(journal_path=JOURNAL_FILE):
+    """Start an empty journal; the new inode tells running recognizers to reload"""
+    open(journal_path + ".tmp", "wb").close()
+    os.replace(journal_path + ".tmp", journal_path)
+
+def replace_gallery(encodings, row_names, path=GALLERY_FILE, journal_path=JOURNAL_FILE):
+    """Write a retrained gallery file and drop the journal; return True if it had changes
+
+    Journal changes refer to the previous gallery file. Replayed on a retrained one they
+    would hide people removed earlier and trained again, and duplicate people who were
+    enrolled through the journal and are now in the dataset.
+    """
+    save_gallery(encodings, row_names, path)
+    try:
+        if os.path.getsize(journal_path) == 0:
+            return False
+    except FileNotFoundError:
+        return False
+    reset_journal(journal_path)
+    return True
+
+def remove_person(name, journal_path=JOURNAL_FILE):
+    """Remove every encoding of a person, including those in the gallery file"""
+    append_records([{"op": "remove", "name": name}], journal_path)
+
+def read_journal(journal_path, offset=0):
+    """Read complete records after a byte offset; return (records, new offset)"""
+    try:
+        with open(journal_path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    end = data.rfind(b"\n") + 1  # Ignore a line that is still being written
+    records = [json.loads(line) for line in data[:end].decode("utf-8").splitlines() if line.strip()]
+    return records, offset + end
+
+def file_identity(path):
+    """(inode, mtime) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def journal_inode(path):
+    """Inode of the journal, which changes when it is compacted"""
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+def empty_gallery(path=None):
+    return Gallery(np.empty((0, ENCODING_DIM), dtype=np.float32), np.empty(0, dtype=np.int32), [], path=path)
+
+class GalleryView:
+    """Immutable snapshot: the indexed gallery file plus the journaled changes on top of it"""
+    def __init__(self, index, removed_labels=frozenset(), delta_encodings=None, delta_names=(), masked_norms=None):
+        self.index = index
+        self.gallery = index.gallery
+        self.removed_labels = removed_labels  # Labels of gallery-file people that were removed
+        self.masked_norms = masked_norms      # Gallery norms with removed people's rows set to +inf
+        if delta_encodings is None:
+            delta_encodings = np.empty((0, ENCODING_DIM), dtype=np.float32)
+        self.delta_encodings = delta_encodings
+        self.delta_names = tuple(delta_names)
+        self.delta_norms = squared_norms(delta_encodings)
+
+    def apply(self, records):
+        """Return a new view with the records applied; cost depends on the journal, not the gallery"""
+        removed = set(self.removed_labels)
+        encodings = [self.delta_encodings]
+        names = list(self.delta_names)
+        label_of = None
+        for record in records:
+            name = record["name"]
+            if record["op"] == "add":
+                added = np.asarray(record["encodings"], dtype=np.float32).reshape(-1, ENCODING_DIM)
+                encodings.append(added)
+                names.extend([name] * len(added))
+            elif record["op"] == "remove":
+                if label_of is None:
+                    label_of = {person: label for label, person in enumerate(self.gallery.names)}
+                if name in label_of:
+                    removed.add(label_of[name])
+                # Drop earlier enrollments of the person as well
+                matrix = np.concatenate(encodings)
+                keep = np.array([n != name for n in names], dtype=bool)
+                encodings = [matrix[keep]]
+                names = [n for n in names if n != name]
+        masked_norms = self.masked_norms
+        if removed != self.removed_labels:
+            # Built once per change: searches skip removed rows without copying the gallery
+            masked_norms = self.index.norms.copy()
+            masked_norms[np.isin(np.asarray(self.gallery.labels), list(removed))] = np.inf
+        return GalleryView(self.index, frozenset(removed), np.concatenate(encodings), names, masked_norms)
+
+    def people(self):
+        """Names currently enrolled"""
+        base = {name for label, name in enumerate(self.gallery.names) if label not in self.removed_labels}
+        return sorted(base | set(self.delta_names))
+
+    def __len__(self):
+        return len(self.gallery) + len(self.delta_names)
+
+    def search_gallery(self, queries):
+        """Nearest row in the gallery file for each query, skipping removed people"""
+        return self.index.search(queries, self.masked_norms)
+
+    def match(self, queries, tolerance, unknown="Unknown"):
+        """Return the best matching name for each query, or unknown if none is within tolerance"""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        rows, distances = self.search_gallery(queries)
+        names = [self.gallery.name_of(row) if row >= 0 else unknown for row in rows]
+        if len(self.delta_names) and len(queries):
+            delta_rows, delta_sq = nearest_rows(queries, self.delta_encodings, self.delta_norms)
+            for i, (row, distance) in enumerate(zip(delta_rows, np.sqrt(delta_sq))):
+                if distance < distances[i]:
+                    names[i], distances[i] = self.delta_names[row], distance
+        return [name if distance <= tolerance else unknown for name, distance in zip(names, distances)]
+
+class LiveGallery:
+    """Face gallery that follows the gallery file and the enrollment journal while running
+
+    Each recognition worker calls refresh() between frames. New journal lines are applied
+    incrementally and the result replaces the current view in a single assignment, so a
+    frame is always matched against one consistent gallery. The gallery file is only
+    reloaded (and re-indexed) when it is replaced, for example by model_training.py.
+    """
+    def __init__(self, path=GALLERY_FILE, journal_path=JOURNAL_FILE, kind=INDEX_KIND,
+                 check_interval=RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.journal_path = journal_path
+        self.kind = kind
+        self.check_interval = check_interval
+        self.last_check = 0
+        self.gallery_id = None
+        self.journal_id = None
+        self.journal_offset = 0
+        self.view = None
+        self.load()
+
+    @property
+    def gallery(self):
+        return self.view.gallery
+
+    def __len__(self):
+        return len(self.view)
+
+    def load(self):
+        """Load and index the gallery file, then apply the whole journal"""
+        self.gallery_id = file_identity(self.path)
+        if self.gallery_id is None and not os.path.exists(LEGACY_PICKLE) and os.path.exists(self.journal_path):
+            gallery = empty_gallery(self.path)  # Everyone was enrolled through the journal
+        else:
+            gallery = open_gallery(self.path)
+            self.gallery_id = file_identity(self.path)
+        self.journal_id = journal_inode(self.journal_path)
+        records, self.journal_offset = read_journal(self.journal_path)
+        self.view = GalleryView(build_index(gallery, self.kind)).apply(records)
+
+    def refresh(self, now=None):
+        """Pick up gallery changes; return True if the view was replaced"""
+        now = time.time() if now is None else now
+        if now - self.last_check < self.check_interval:
+            return False
+        self.last_check = now
+
+        try:
+            stat = os.stat(self.journal_path)
+            journal_id, journal_size = stat.st_ino, stat.st_size
+        except FileNotFoundError:
+            journal_id, journal_size = None, 0
+        start = time.perf_counter()
+        try:
+            if self.journal_id is None:
+                self.journal_id = journal_id  # First enrollment created the journal
+            if (file_identity(self.path) != self.gallery_id or journal_id != self.journal_id
+                    or journal_size < self.journal_offset):
+                # Gallery retrained or journal compacted
+                self.load()
+                print(f"[INFO] Gallery reloaded: {len(self.view)} encodings "
+                      f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+                return True
+            if journal_size > self.journal_offset:
+                records, offset = read_journal(self.journal_path, self.journal_offset)
+                if records:
+                    self.view = self.view.apply(records)
+                self.journal_offset = offset
+                print(f"[INFO] Gallery updated: {len(records)} changes applied "
+                      f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+                return bool(records)
+        except Exception as e:
+            print(f"[ERROR] Gallery refresh failed, keeping the current gallery: {e}")
+        return False
+
+    def match(self, queries, tolerance, unknown="Unknown"):
+        return self.view.match(queries, tolerance, unknown)
+
+def compact_gallery(path=GALLERY_FILE, journal_path=JOURNAL_FILE):
+    """Merge the journal into the gallery file and start an empty journal"""
+    live = LiveGallery(path, journal_path, kind="exact")
+    view = live.view
+    labels = np.asarray(view.gallery.labels)
+    keep = np.flatnonzero(~np.isin(labels, list(view.removed_labels))) if view.removed_labels else np.arange(len(labels))
+    encodings = np.concatenate([np.asarray(view.gallery.encodings)[keep], view.delta_encodings])
+    row_names = [view.gallery.names[label] for label in labels[keep]] + list(view.delta_names)
+    save_gallery(encodings, row_names, path)
+    reset_journal(journal_path)
+    print(f"[INFO] Compacted gallery: {len(row_names)} encodings for {len(set(row_names))} people")
+
+def main():
+    parser = argparse.ArgumentParser(description="Enroll or remove people without retraining or restarting")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="encode images and enroll them for a person")
+    add.add_argument("name")
+    add.add_argument("images", nargs="+", help="image files or folders")
+    remove = commands.add_parser("remove", help="remove every encoding of a person")
+    remove.add_argument("name")
+    commands.add_parser("compact", help="merge enrolled changes into the gallery file")
+    commands.add_parser("list", help="list enrolled people")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        from imutils import paths
+        from model_training import encode_image
+        image_paths = []
+        for item in args.images:
+            image_paths.extend(sorted(paths.list_images(item)) if os.path.isdir(item) else [item])
+        encodings = []
+        for image_path in image_paths:
+            _, found = encode_image(image_path)
+            if len(found) != 1:
+                print(f"[INFO] Skipping {image_path}: {len(found)} faces found")
+                continue
+            encodings.extend(found)
+        count = add_person(args.name, encodings)
+        print(f"[INFO] Enrolled {count} encodings for {args.name}")
+    elif args.command == "remove":
+        remove_person(args.name)
+        print(f"[INFO] Removed {args.name}")
+    elif args.command == "compact":
+        compact_gallery()
+    elif args.command == "list":
+        for name in LiveGallery().view.people():
+            print(name)
+
+if __name__ == "__main__":
+    main()
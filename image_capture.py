@@ -1,5 +1,8 @@
 import cv2
 import os
+import time
+import argparse
+import numpy as np
 from datetime import datetime
 
 # Change this to the name of the person you're photographing
@@ -8,6 +11,19 @@ PERSON_NAME = "DuongHuyen"
 # IP Webcam URL (replace with your phone IP)
 IP_CAMERA_URL = "http://10.136.44.140:8080/video"  
 
+# Auto-enrollment settings
+AUTO_ENROLL_COUNT = 8     # Best frames kept and enrolled per person
+DETECT_SCALE = 4          # Live face detection runs on a frame shrunk by this factor
+MIN_FACE_SIZE = 80        # Minimum face height in pixels of the full frame
+IDEAL_FACE_SIZE = 160     # Face height at which size stops adding to the score
+MIN_SHARPNESS = 60.0      # Minimum Laplacian variance of the face (lower = blurrier)
+MAX_YAW = 0.25            # Maximum nose offset from the eye midpoint, relative to eye distance
+MAX_ROLL = 15.0           # Maximum eye-line tilt in degrees
+DUPLICATE_PIXEL_DIFF = 6.0  # Mean gray difference of face thumbnails below which a frame is a duplicate
+DUPLICATE_DISTANCE = 0.2    # Encoding distance below which a frame is a near-duplicate
+ENCODE_INTERVAL = 0.3     # Minimum seconds between encodings of candidate frames
+THUMB_SIZE = 32           # Face thumbnail size used for the cheap duplicate check
+
 def create_folder(name):
     dataset_folder = "dataset"
     if not os.path.exists(dataset_folder):
@@ -57,6 +73,147 @@ def capture_photos(name):
     cv2.destroyAllWindows()
     print(f"Photo capture completed. {photo_count} photos saved for {name}.")
 
-if __name__ == "__main__":
-    capture_photos(PERSON_NAME)
+def face_sharpness(gray_face):
+    """Variance of the Laplacian of a face crop resized to a fixed size (higher = sharper)"""
+    face = cv2.resize(gray_face, (IDEAL_FACE_SIZE, IDEAL_FACE_SIZE), interpolation=cv2.INTER_AREA)
+    return float(cv2.Laplacian(face, cv2.CV_64F).var())
+
+def face_pose(landmarks):
+    """Approximate (yaw, roll) from the 5-point landmarks: nose offset and eye-line angle"""
+    left_eye = np.mean(landmarks["left_eye"], axis=0)
+    right_eye = np.mean(landmarks["right_eye"], axis=0)
+    nose = np.array(landmarks["nose_tip"][0], dtype=float)
+    eye_vector = right_eye - left_eye
+    eye_distance = max(float(np.hypot(*eye_vector)), 1.0)
+    roll = float(np.degrees(np.arctan2(eye_vector[1], eye_vector[0])))
+    if roll > 90:
+        roll -= 180
+    elif roll < -90:
+        roll += 180
+    yaw = float(np.dot(nose - (left_eye + right_eye) / 2, eye_vector) / eye_distance ** 2)
+    return yaw, roll
+
+def score_candidate(face_recognition, rgb, gray, box):
+    """Quality gates and score of one face; return (score, reason) with score None if rejected"""
+    top, right, bottom, left = box
+    size = bottom - top
+    if size < MIN_FACE_SIZE:
+        return None, "too small"
+    sharpness = face_sharpness(gray[top:bottom, left:right])
+    if sharpness < MIN_SHARPNESS:
+        return None, "blurry"
+    landmarks = face_recognition.face_landmarks(rgb, [box], model="small")
+    if not landmarks:
+        return None, "no landmarks"
+    yaw, roll = face_pose(landmarks[0])
+    if abs(yaw) > MAX_YAW or abs(roll) > MAX_ROLL:
+        return None, "turned"
+    # Sharper, larger and more frontal faces score higher
+    score = sharpness * min(1.0, size / IDEAL_FACE_SIZE) * (1 - abs(yaw) / MAX_YAW / 2) * (1 - abs(roll) / MAX_ROLL / 2)
+    return score, "ok"
+
+def face_thumbnail(gray, box):
+    top, right, bottom, left = box
+    return cv2.resize(gray[top:bottom, left:right], (THUMB_SIZE, THUMB_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+def auto_enroll(name, count=AUTO_ENROLL_COUNT, source=IP_CAMERA_URL):
+    """Keep the best quality-gated frames of one person and enroll their encodings directly"""
+    import face_recognition
+    from gallery_service import add_person
+
+    folder = create_folder(name)
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        print("Khong ket noi duoc camera.")
+        return
+
+    kept = []  # Dicts with score, encoding, thumbnail, frame and box, best first
+    rejected = {}
+    last_encode = 0
+    print(f"Auto-enrolling {name}: look at the camera and turn slightly. Press 'q' to finish.")
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            print("Khong nhan duoc khung hinh camera.")
+            break
+
+        # Cheap detection on a downscaled copy
+        small = cv2.resize(frame, (0, 0), fx=1/DETECT_SCALE, fy=1/DETECT_SCALE)
+        boxes = face_recognition.face_locations(cv2.cvtColor(small, cv2.COLOR_BGR2RGB), number_of_times_to_upsample=1, model="hog")
+        status = f"kept {len(kept)}/{count}"
+        now = time.time()
 
+        if len(boxes) == 1 and now - last_encode >= ENCODE_INTERVAL:
+            height, width = frame.shape[:2]
+            top, right, bottom, left = (int(v * DETECT_SCALE) for v in boxes[0])
+            box = (max(0, top), min(width, right), min(height, bottom), max(0, left))
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            score, reason = score_candidate(face_recognition, rgb, gray, box)
+            worst = kept[-1]["score"] if len(kept) >= count else 0.0
+
+            if score is not None and score > worst:
+                # Near-duplicates of kept frames only get in by replacing them with a better one
+                thumbnail = face_thumbnail(gray, box)
+                similar = [item for item in kept if np.mean(np.abs(thumbnail - item["thumbnail"])) < DUPLICATE_PIXEL_DIFF]
+                if similar and any(item["score"] >= score for item in similar):
+                    reason = "duplicate"
+                else:
+                    # Encode with the same model as model_training.py, so the gallery stays consistent
+                    last_encode = now
+                    encoding = face_recognition.face_encodings(rgb, [box])[0]
+                    similar_ids = {id(item) for item in similar}
+                    similar += [item for item in kept if id(item) not in similar_ids
+                                and np.linalg.norm(item["encoding"] - encoding) < DUPLICATE_DISTANCE]
+                    if any(item["score"] >= score for item in similar):
+                        reason = "duplicate"
+                    else:
+                        similar_ids = {id(item) for item in similar}
+                        kept = [item for item in kept if id(item) not in similar_ids]
+                        kept.append({"score": score, "encoding": encoding, "thumbnail": thumbnail,
+                                     "frame": frame.copy(), "box": box})
+                        kept.sort(key=lambda item: item["score"], reverse=True)
+                        del kept[count:]
+                        reason = "kept"
+            elif score is not None:
+                reason = "not better"
+            rejected[reason] = rejected.get(reason, 0) + (reason != "kept")
+            status = f"kept {len(kept)}/{count} - {reason}"
+        elif len(boxes) > 1:
+            status = f"kept {len(kept)}/{count} - one face only"
+
+        for top, right, bottom, left in boxes:
+            cv2.rectangle(frame, (left * DETECT_SCALE, top * DETECT_SCALE),
+                          (right * DETECT_SCALE, bottom * DETECT_SCALE), (0, 255, 0), 2)
+        cv2.putText(frame, status, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.imshow('Capture', frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+
+    cap.release()
+    cv2.destroyAllWindows()
+    if not kept:
+        print(f"No usable frames for {name}.")
+        return
+
+    # Keep the images for future retraining and enroll the encodings right away
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    for i, item in enumerate(kept):
+        cv2.imwrite(os.path.join(folder, f"{name}_{timestamp}_{i}.jpg"), item["frame"])
+    add_person(name, [item["encoding"] for item in kept])
+    summary = ", ".join(f"{reason} {n}" for reason, n in rejected.items() if n)
+    print(f"Enrolled {len(kept)} encodings for {name} (scores {kept[-1]['score']:.0f}-{kept[0]['score']:.0f}). "
+          f"Rejected: {summary or 'none'}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capture face photos for the dataset")
+    parser.add_argument("--name", default=PERSON_NAME)
+    parser.add_argument("--auto", action="store_true",
+                        help="keep the best frames automatically and enroll them without retraining")
+    parser.add_argument("--count", type=int, default=AUTO_ENROLL_COUNT, help="frames kept in auto mode")
+    args = parser.parse_args()
+    if args.auto:
+        auto_enroll(args.name, args.count)
+    else:
+        capture_photos(args.name)
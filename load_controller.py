@@ -0,0 +1,164 @@
+import os
+import json
+import time
+from collections import deque
+from datetime import datetime
+import numpy as np
+
+# Configuration
+TARGET_LATENCY = 0.5      # Seconds from frame hand-off to applied result the controller aims for (p90)
+RESTORE_FRACTION = 0.6    # Restore quality only while p90 latency is below this share of the target
+ADJUST_INTERVAL = 5.0     # Seconds between decisions
+RESTORE_DELAY = 15.0      # Seconds after a degradation before quality may be restored
+MIN_SAMPLES = 5           # Latency samples needed in an interval to judge it
+BACKLOG_LIMIT = 0.5       # Share of frames that found work still waiting for a worker
+TEMP_LIMIT = 75.0         # CPU temperature (C) above which load is shed (the Pi 4 throttles at 80)
+TEMP_MARGIN = 5.0         # Degrees below TEMP_LIMIT required before restoring
+LOAD_LIMIT = 1.5          # 1-minute load average per core above which load is shed
+SKIP_RANGE = (1, 6)       # Frames between detections while nobody is tracked (best, worst)
+SCALE_RANGE = (4, 12)     # Detection scale cv_scaler (best, worst)
+SCALE_STEP = 2            # cv_scaler step, a multiple of ENCODE_SCALE
+MAX_FACES_RANGE = (3, 1)  # Faces processed per frame (best, worst)
+AUDIT_FILE = "load_audit.jsonl"  # Every adjustment, one JSON object per line
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+
+# Knobs in the order load is shed; quality is restored in reverse order
+KNOBS = ["skip_frames", "cv_scaler", "max_faces"]
+IDLE_ONLY_KNOBS = {"skip_frames"}  # No effect while faces are tracked (TRACK_DETECT_EVERY applies then)
+
+def read_cpu_temperature(path=THERMAL_ZONE):
+    """CPU temperature in degrees C, or None where the thermal zone is not available"""
+    try:
+        with open(path) as f:
+            return int(f.read().strip()) / 1000
+    except (OSError, ValueError):
+        return None
+
+def read_load_per_core():
+    """1-minute load average divided by the number of cores"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        return None
+
+class LoadController:
+    """Closed-loop tuner for frame skip, detection scale and the per-frame face limit
+
+    It collects recognition latencies and backlog samples, and every ADJUST_INTERVAL seconds
+    compares the p90 latency, the backlog, the CPU temperature and the load with their
+    limits. Under pressure it sheds load one step at a time (more skipped frames first,
+    then a coarser detection scale, then fewer faces); with ample headroom it restores
+    quality in reverse order, but not within RESTORE_DELAY of the last degradation. Frame
+    skip is left alone while faces are tracked, since it has no effect then. Every
+    change is printed and appended to the audit file.
+    """
+    def __init__(self, skip_frames, cv_scaler, max_faces, camera_id=None, target_latency=TARGET_LATENCY,
+                 audit_file=AUDIT_FILE, temperature=read_cpu_temperature, load=read_load_per_core):
+        self.ranges = {"skip_frames": SKIP_RANGE, "cv_scaler": SCALE_RANGE, "max_faces": MAX_FACES_RANGE}
+        self.steps = {"skip_frames": 1, "cv_scaler": SCALE_STEP, "max_faces": 1}
+        self.settings = {
+            "skip_frames": self.clamp("skip_frames", skip_frames),
+            "cv_scaler": self.clamp("cv_scaler", cv_scaler),
+            "max_faces": self.clamp("max_faces", max_faces),
+        }
+        self.camera_id = camera_id
+        self.target_latency = target_latency
+        self.audit_file = audit_file
+        self.temperature = temperature
+        self.load = load
+        self.latencies = deque(maxlen=500)
+        self.backlog_samples = 0
+        self.backlog_hits = 0
+        self.last_decision = time.time()
+        self.last_degrade = 0
+        self.adjustments = 0
+
+    def clamp(self, knob, value):
+        best, worst = self.ranges[knob]
+        return int(min(max(value, min(best, worst)), max(best, worst)))
+
+    def direction(self, knob):
+        """+1 if raising the knob sheds load, -1 if lowering it does"""
+        best, worst = self.ranges[knob]
+        return 1 if worst >= best else -1
+
+    def observe_latency(self, seconds):
+        self.latencies.append(seconds)
+
+    def observe_backlog(self, pending):
+        self.backlog_samples += 1
+        self.backlog_hits += pending > 0
+
+    def update(self, now=None, tracking=False):
+        """Decide once per interval; return the changed settings as {knob: value} (empty if none)
+
+        Pass tracking=True while faces are tracked, so knobs without effect then are left alone.
+        """
+        now = time.time() if now is None else now
+        if now - self.last_decision < ADJUST_INTERVAL:
+            return {}
+        self.last_decision = now
+
+        latencies = list(self.latencies)
+        self.latencies.clear()
+        backlog = self.backlog_hits / self.backlog_samples if self.backlog_samples else 0.0
+        self.backlog_samples = self.backlog_hits = 0
+        inputs = {
+            "latency_p90": float(np.percentile(latencies, 90)) if len(latencies) >= MIN_SAMPLES else None,
+            "samples": len(latencies),
+            "backlog": round(backlog, 3),
+            "temperature": self.temperature(),
+            "load_per_core": self.load(),
+            "tracking": tracking,
+        }
+        knobs = [knob for knob in KNOBS if not (tracking and knob in IDLE_ONLY_KNOBS)]
+
+        reasons = []
+        if inputs["latency_p90"] is not None and inputs["latency_p90"] > self.target_latency:
+            reasons.append(f"latency p90 {inputs['latency_p90']:.2f}s > {self.target_latency:.2f}s")
+        if backlog > BACKLOG_LIMIT:
+            reasons.append(f"backlog {backlog:.0%} > {BACKLOG_LIMIT:.0%}")
+        if inputs["temperature"] is not None and inputs["temperature"] >= TEMP_LIMIT:
+            reasons.append(f"CPU {inputs['temperature']:.1f}C >= {TEMP_LIMIT:.0f}C")
+        if inputs["load_per_core"] is not None and inputs["load_per_core"] > LOAD_LIMIT:
+            reasons.append(f"load {inputs['load_per_core']:.2f}/core > {LOAD_LIMIT:.2f}")
+        if reasons:
+            return self.step(knobs, 1, "; ".join(reasons), inputs, now)
+
+        headroom = (inputs["latency_p90"] is not None
+                    and inputs["latency_p90"] < self.target_latency * RESTORE_FRACTION
+                    and backlog <= BACKLOG_LIMIT / 2
+                    and (inputs["temperature"] is None or inputs["temperature"] < TEMP_LIMIT - TEMP_MARGIN))
+        if headroom and now - self.last_degrade >= RESTORE_DELAY:
+            reason = f"latency p90 {inputs['latency_p90']:.2f}s < {self.target_latency * RESTORE_FRACTION:.2f}s"
+            return self.step(list(reversed(knobs)), -1, reason, inputs, now)
+        return {}
+
+    def step(self, knobs, sign, reason, inputs, now):
+        """Move the first knob that is not at its bound one step (sign 1 sheds load, -1 restores)"""
+        for knob in knobs:
+            old = self.settings[knob]
+            new = self.clamp(knob, old + sign * self.direction(knob) * self.steps[knob])
+            if new == old:
+                continue
+            self.settings[knob] = new
+            self.adjustments += 1
+            if sign > 0:
+                self.last_degrade = now
+            self.audit(knob, old, new, "degrade" if sign > 0 else "restore", reason, inputs, now)
+            return {knob: new}
+        return {}
+
+    def audit(self, knob, old, new, action, reason, inputs, now):
+        """Print an adjustment and append it to the audit file"""
+        camera = f"[{self.camera_id}] " if self.camera_id else ""
+        print(f"[INFO] {camera}Load controller: {action} {knob} {old} -> {new} ({reason})")
+        record = {"time": datetime.fromtimestamp(now).isoformat(timespec="seconds"), "camera": self.camera_id,
+                  "action": action, "setting": knob, "old": old, "new": new, "reason": reason,
+                  "settings": dict(self.settings)}
+        record.update(inputs)
+        try:
+            with open(self.audit_file, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"[ERROR] Cannot write load audit: {e}")
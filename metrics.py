@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configuration
+METRICS_HOST = "127.0.0.1"    # Only reachable from the Pi itself
+METRICS_PORT = 9100           # Port of the Prometheus endpoint (0 = disabled)
+SNAPSHOT_FILE = "metrics.json"
+SNAPSHOT_INTERVAL = 10.0      # Seconds between JSON snapshots (0 = disabled)
+# Latency buckets in seconds, from 1 ms to 5 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+def format_labels(labels, extra=None):
+    """Prometheus label set like {camera="0",le="0.5"}"""
+    items = list(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class Counter:
+    """Monotonic count; with a function, the value is read from it at collection time"""
+    kind = "counter"
+
+    def __init__(self, name, description, labels=None, function=None):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self.function = function
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def get(self):
+        if self.function:
+            try:
+                return self.function()
+            except Exception:
+                return 0
+        return self.value
+
+    def samples(self):
+        yield self.name, self.labels, self.get()
+
+    def snapshot(self):
+        return self.get()
+
+class Gauge(Counter):
+    """Value that can go up and down; with a function, it is read at collection time"""
+    kind = "gauge"
+
+    def set(self, value):
+        self.value = value
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+class Histogram:
+    """Distribution of observed values in fixed cumulative buckets"""
+    kind = "histogram"
+
+    def __init__(self, name, description, labels=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last one counts values above every bucket
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """Context manager that observes the seconds spent inside it"""
+        return HistogramTimer(self)
+
+    def samples(self):
+        with self.lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            yield self.name + "_bucket", dict(self.labels, le=format_value(bound)), cumulative
+        yield self.name + "_sum", self.labels, total
+        yield self.name + "_count", self.labels, count
+
+    def quantile(self, q):
+        """Upper bucket bound below which a fraction q of the observations fall"""
+        with self.lock:
+            counts = list(self.counts)
+            count = self.count
+        if not count:
+            return None
+        target = q * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        with self.lock:
+            count, total = self.count, self.sum
+        return {
+            "count": count,
+            "avg": total / count if count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+        }
+
+class HistogramTimer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+class Registry:
+    """Named metrics, created once and looked up again by name and labels"""
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def get_or_create(self, cls, name, description, labels=None, **kwargs):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self.lock:
+            metric = self.metrics.get(key)
+            if metric is None:
+                metric = cls(name, description, labels, **kwargs)
+                self.metrics[key] = metric
+            elif kwargs.get("function") is not None:
+                # A restarted component takes over the metric
+                metric.function = kwargs["function"]
+            return metric
+
+    def counter(self, name, description, labels=None, function=None):
+        return self.get_or_create(Counter, name, description, labels, function=function)
+
+    def gauge(self, name, description, labels=None, function=None):
+        return self.get_or_create(Gauge, name, description, labels, function=function)
+
+    def histogram(self, name, description, labels=None, buckets=LATENCY_BUCKETS):
+        return self.get_or_create(Histogram, name, description, labels, buckets=buckets)
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        described = set()
+        for metric in metrics:
+            if metric.name not in described:
+                lines.append(f"# HELP {metric.name} {metric.description}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                described.add(metric.name)
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Plain dict of every metric for the JSON snapshot"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        data = {}
+        for metric in metrics:
+            data[metric.name + format_labels(metric.labels)] = metric.snapshot()
+        return data
+
+REGISTRY = Registry()
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # No line per scrape
+
+class MetricsExporter:
+    """Serve the registry over HTTP and write a JSON snapshot periodically, both on daemon threads"""
+    def __init__(self, registry=REGISTRY, port=METRICS_PORT, snapshot_file=SNAPSHOT_FILE,
+                 snapshot_interval=SNAPSHOT_INTERVAL, host=METRICS_HOST):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.snapshot_file = snapshot_file
+        self.snapshot_interval = snapshot_interval
+        self.server = None
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def start(self):
+        if self.port:
+            handler = type("Handler", (MetricsHandler,), {"registry": self.registry})
+            try:
+                self.server = ThreadingHTTPServer((self.host, self.port), handler)
+                self.server.daemon_threads = True
+                thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+                print(f"[INFO] Metrics at http://{self.host}:{self.server.server_address[1]}/metrics")
+            except OSError as e:
+                print(f"[ERROR] Cannot start metrics endpoint on port {self.port}: {e}")
+                self.server = None
+        if self.snapshot_file and self.snapshot_interval:
+            self.stop_event.clear()
+            thread = threading.Thread(target=self.run_snapshots, name="metrics-snapshot", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for thread in self.threads:
+            thread.join(timeout=2)
+        self.threads = []
+        if self.snapshot_file and self.snapshot_interval:
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        """Write the current values atomically, so readers never see a partial file"""
+        data = {"timestamp": time.time(), "metrics": self.registry.snapshot()}
+        tmp_path = self.snapshot_file + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp_path, self.snapshot_file)
+        except OSError as e:
+            print(f"[ERROR] Cannot write metrics snapshot: {e}")
+
+    def run_snapshots(self):
+        while not self.stop_event.wait(self.snapshot_interval):
+            self.write_snapshot()
@@ -1,31 +1,185 @@
 import os
+import time
+import pickle
+import hashlib
+import argparse
+import multiprocessing
 from imutils import paths
 import face_recognition
-import pickle
 import cv2
+from gallery import GALLERY_FILE
+from gallery_service import JOURNAL_FILE, replace_gallery
+from face_detectors import get_detector
 
-print("[INFO] start processing faces...")
-imagePaths = list(paths.list_images("dataset"))
-knownEncodings = []
-knownNames = []
+# Configuration
+DATASET_DIR = "dataset"
+CACHE_FILE = "encodings_cache.pickle"  # Per-image encodings keyed by content hash
+CACHE_VERSION = 1
+WORKERS = os.cpu_count() or 1  # Number of encoding processes (1 = run inline)
+DETECTOR = "hog"  # Face detector backend (see face_detectors.py); use the one the live system runs
+DETECT_UPSAMPLE = 1  # Times each image is upsampled to find smaller faces
 
-for (i, imagePath) in enumerate(imagePaths):
-    print(f"[INFO] processing image {i + 1}/{len(imagePaths)}")
-    name = imagePath.split(os.path.sep)[-2]
-    
-    image = cv2.imread(imagePath)
+def file_hash(path):
+    """Return the SHA-1 hex digest of a file's content"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def encode_image(image_path):
+    """Detect and encode every face in a single image"""
+    image = cv2.imread(image_path)
+    if image is None:
+        return image_path, []
     rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    
-    boxes = face_recognition.face_locations(rgb, model="hog")
+
+    boxes = get_detector(DETECTOR).detect(rgb, DETECT_UPSAMPLE)
     encodings = face_recognition.face_encodings(rgb, boxes)
-    
-    for encoding in encodings:
-        knownEncodings.append(encoding)
-        knownNames.append(name)
+    return image_path, encodings
+
+def set_detector(kind):
+    """Select the detector backend; worker processes inherit it"""
+    global DETECTOR
+    DETECTOR = kind
+
+def new_cache():
+    """Return an empty encoding cache"""
+    return {"version": CACHE_VERSION, "detector": DETECTOR, "files": {}, "encodings": {}}
+
+def load_cache(path):
+    """Load the encoding cache, returning an empty one if missing or outdated"""
+    if not os.path.exists(path):
+        return new_cache()
+    try:
+        with open(path, "rb") as f:
+            cache = pickle.loads(f.read())
+        if cache.get("version") != CACHE_VERSION:
+            print("[INFO] Cache version changed, rebuilding from scratch")
+            return new_cache()
+        if cache.get("detector", "hog") != DETECTOR:
+            print(f"[INFO] Cache was built with the {cache.get('detector', 'hog')} detector, rebuilding from scratch")
+            return new_cache()
+        return cache
+    except Exception as e:
+        print(f"[INFO] Cannot read cache ({e}), rebuilding from scratch")
+        return new_cache()
+
+def save_cache(cache, path):
+    """Write the encoding cache atomically"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(pickle.dumps(cache))
+    os.replace(tmp_path, path)
+
+def hash_images(image_paths, cache):
+    """Map each image to its content hash, skipping unchanged files by size and mtime"""
+    hashes = {}
+    files = {}
+    for image_path in image_paths:
+        stat = os.stat(image_path)
+        cached = cache["files"].get(image_path)
+        if cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime:
+            content_hash = cached["hash"]
+        else:
+            content_hash = file_hash(image_path)
+        hashes[image_path] = content_hash
+        files[image_path] = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": content_hash}
+    return hashes, files
+
+def encode_images(image_paths, workers):
+    """Encode images on a pool of worker processes, yielding results as they finish"""
+    if workers <= 1 or len(image_paths) <= 1:
+        for image_path in image_paths:
+            yield encode_image(image_path)
+        return
+
+    with multiprocessing.Pool(processes=min(workers, len(image_paths))) as pool:
+        for result in pool.imap_unordered(encode_image, image_paths):
+            yield result
+
+def build_encodings(dataset_dir=DATASET_DIR, workers=WORKERS, use_cache=True):
+    """Build encodings for the dataset, re-encoding only new or changed images"""
+    image_paths = sorted(paths.list_images(dataset_dir))
+    cache = load_cache(CACHE_FILE) if use_cache else new_cache()
+    hashes, files = hash_images(image_paths, cache)
+
+    # Only images whose content is not cached need encoding
+    todo = []
+    queued = set()
+    for image_path in image_paths:
+        content_hash = hashes[image_path]
+        if content_hash not in cache["encodings"] and content_hash not in queued:
+            todo.append(image_path)
+            queued.add(content_hash)
+
+    print(f"[INFO] {len(image_paths)} images, {len(image_paths) - len(todo)} cached, "
+          f"{len(todo)} to encode on {max(1, min(workers, len(todo)))} worker(s)")
+
+    start_time = time.time()
+    faces_found = 0
+    for (i, (image_path, encodings)) in enumerate(encode_images(todo, workers)):
+        cache["encodings"][hashes[image_path]] = list(encodings)
+        faces_found += len(encodings)
+
+        elapsed = max(time.time() - start_time, 1e-6)
+        print(f"[INFO] processed image {i + 1}/{len(todo)} "
+              f"({(i + 1) / elapsed:.2f} images/s, {faces_found / elapsed:.2f} faces/s)")
+    elapsed = time.time() - start_time
+
+    # Drop encodings of deleted or changed images
+    live_hashes = set(hashes.values())
+    removed = [h for h in cache["encodings"] if h not in live_hashes]
+    for content_hash in removed:
+        del cache["encodings"][content_hash]
+    cache["files"] = files
+
+    knownEncodings = []
+    knownNames = []
+    for image_path in image_paths:
+        name = image_path.split(os.path.sep)[-2]
+        for encoding in cache["encodings"][hashes[image_path]]:
+            knownEncodings.append(encoding)
+            knownNames.append(name)
+
+    if use_cache:
+        save_cache(cache, CACHE_FILE)
+
+    print(f"[INFO] Encoded {len(todo)} images ({faces_found} faces) in {elapsed:.2f}s")
+    if todo and elapsed > 0:
+        print(f"[INFO] Throughput: {len(todo) / elapsed:.2f} images/s, {faces_found / elapsed:.2f} faces/s")
+    if removed:
+        print(f"[INFO] Dropped {len(removed)} stale cache entries")
+
+    return knownEncodings, knownNames
+
+def main():
+    parser = argparse.ArgumentParser(description="Build face encodings from the dataset folder")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="number of encoding processes (default: all cores)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore the encoding cache and re-encode every image")
+    parser.add_argument("--prototypes", type=int, default=0,
+                        help="keep only this many prototype encodings per person (0 = keep all)")
+    parser.add_argument("--detector", default=DETECTOR, choices=["hog", "haar", "dnn"],
+                        help="face detector backend")
+    args = parser.parse_args()
+    set_detector(args.detector)
+
+    print("[INFO] start processing faces...")
+    knownEncodings, knownNames = build_encodings(workers=args.workers, use_cache=not args.no_cache)
+
+    if args.prototypes > 0:
+        from gallery_prototypes import build_prototypes
+        rows = len(knownNames)
+        knownEncodings, knownNames = build_prototypes(knownEncodings, knownNames, args.prototypes)
+        print(f"[INFO] Compacted {rows} encodings to {len(knownNames)} prototypes")
+
+    print("[INFO] serializing encodings...")
+    if replace_gallery(knownEncodings, knownNames, GALLERY_FILE):
+        print(f"[INFO] Cleared '{JOURNAL_FILE}': enrollments since the last training are replaced by this gallery")
 
-print("[INFO] serializing encodings...")
-data = {"encodings": knownEncodings, "names": knownNames}
-with open("encodings.pickle", "wb") as f:
-    f.write(pickle.dumps(data))
+    print(f"[INFO] Training complete. Encodings saved to '{GALLERY_FILE}'")
 
-print("[INFO] Training complete. Encodings saved to 'encodings.pickle'")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
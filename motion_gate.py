@@ -0,0 +1,117 @@
+import os
+import time
+import cv2
+import numpy as np
+
+# Configuration
+MOTION_SCALE = 16          # Downscale factor of the frame compared for motion
+MOTION_THRESHOLD = 12      # Per-pixel gray level change counted as motion
+MOTION_MIN_AREA = 0.01     # Fraction of changed pixels that counts as activity
+ACTIVE_HOLD = 3.0          # Seconds the scene stays "active" after the last motion
+ACTIVE_INTERVAL = 0.0      # Minimum seconds between recognitions while active
+IDLE_INTERVAL = 2.0        # Seconds between recognitions while the scene is static
+BACKGROUND_RATE = 0.05     # How quickly the background model absorbs slow changes (lighting)
+CPU_SAMPLE_INTERVAL = 1.0  # Seconds between CPU usage samples
+
+def process_cpu_seconds(pids=()):
+    """CPU seconds used by this process plus the given live child processes"""
+    times = os.times()
+    cpu = times.user + times.system
+    ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / ticks  # utime, stime
+        except (OSError, IndexError, ValueError):
+            pass
+    return cpu
+
+class MotionGate:
+    """Suppress recognition on a static scene and pick the recognition rate from recent activity
+
+    Motion is measured by differencing a heavily downscaled, blurred gray frame against a
+    running-average background. While active, recognition runs at the normal rate; while
+    idle, only a slow heartbeat recognition runs.
+    """
+    def __init__(self, scale=MOTION_SCALE, active_interval=ACTIVE_INTERVAL, idle_interval=IDLE_INTERVAL):
+        self.scale = scale
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.background = None
+        self.last_motion_time = None
+        self.last_allowed_time = 0
+        self.active = False
+        self.motion_level = 0.0
+
+        # Wake-up latency and idle CPU statistics
+        self.wake_time = None          # When the current active period started
+        self.wake_latencies = []       # Seconds from motion onset to first recognized face
+        self.idle_cpu_seconds = 0.0
+        self.idle_wall_seconds = 0.0
+        self.last_cpu_sample = None
+        self.worker_pids = []          # Other processes (recognition workers) to include in CPU usage
+
+    def update(self, frame, now=None):
+        """Feed a BGR frame; return True if the scene is currently active"""
+        now = time.time() if now is None else now
+        small = cv2.resize(frame, (0, 0), fx=1/self.scale, fy=1/self.scale, interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (3, 3), 0).astype(np.float32)
+
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray
+            self.motion_level = 0.0
+        else:
+            changed = np.abs(gray - self.background) > MOTION_THRESHOLD
+            self.motion_level = float(np.count_nonzero(changed)) / changed.size
+            cv2.accumulateWeighted(gray, self.background, BACKGROUND_RATE)
+
+        if self.motion_level >= MOTION_MIN_AREA:
+            if not self.active:
+                self.wake_time = now
+            self.last_motion_time = now
+        was_active = self.active
+        self.active = self.last_motion_time is not None and now - self.last_motion_time < ACTIVE_HOLD
+        if not self.active:
+            self.wake_time = None  # Activity ended without anyone being recognized
+        self.sample_cpu(was_active, now)
+        return self.active
+
+    def should_recognize(self, now=None):
+        """Return True if a recognition is due at the current activity level"""
+        now = time.time() if now is None else now
+        interval = self.active_interval if self.active else self.idle_interval
+        if now - self.last_allowed_time >= interval:
+            self.last_allowed_time = now
+            return True
+        return False
+
+    def record_recognition(self, face_names, now=None):
+        """Note a recognition result to measure wake-to-first-recognition latency"""
+        now = time.time() if now is None else now
+        if self.wake_time is not None and any(name != "Unknown" for name in face_names):
+            self.wake_latencies.append(now - self.wake_time)
+            self.wake_time = None
+
+    def sample_cpu(self, was_active, now):
+        """Accumulate process CPU time spent while the scene was idle"""
+        if self.last_cpu_sample is not None and now - self.last_cpu_sample[1] < CPU_SAMPLE_INTERVAL:
+            return
+        cpu = process_cpu_seconds(self.worker_pids)
+        if self.last_cpu_sample is not None and not was_active:
+            last_cpu, last_now = self.last_cpu_sample
+            self.idle_cpu_seconds += cpu - last_cpu
+            self.idle_wall_seconds += now - last_now
+        self.last_cpu_sample = (cpu, now)
+
+    def report(self):
+        """Summary of idle CPU usage and wake-to-first-recognition latency"""
+        idle_cpu = self.idle_cpu_seconds / self.idle_wall_seconds * 100 if self.idle_wall_seconds else 0.0
+        latencies = self.wake_latencies
+        return {
+            "idle_cpu_percent": idle_cpu,
+            "idle_seconds": self.idle_wall_seconds,
+            "wake_count": len(latencies),
+            "wake_latency_avg": sum(latencies) / len(latencies) if latencies else None,
+            "wake_latency_max": max(latencies) if latencies else None,
+        }
@@ -0,0 +1,163 @@
+import time
+import argparse
+import threading
+import facial_recognition
+from facial_recognition import OptimizedFaceRecognition, init_runtime, warm_up, gpio_toggles
+from recognition_pool import RecognitionPool
+from checkin_writer import CheckinWriter
+from metrics import MetricsExporter
+
+# Configuration
+CAMERAS = {  # Camera id -> URL, device index or video file, one per entrance
+    "front": "http://10.136.44.208:8080/video",
+    "side": "http://10.136.44.209:8080/video",
+}
+STATUS_INTERVAL = 10  # Seconds between per-camera status lines
+
+class MultiCameraCheckin:
+    """Serve several cameras from one process group
+
+    Each camera gets its own capture thread, tracker, motion gate and check-in cooldown
+    (an OptimizedFaceRecognition). All cameras share the gallery, one pool of recognition
+    workers, the check-in writer, the metrics exporter and the door output. The pool serves
+    the cameras' frames in turn, so a busy entrance cannot starve the others.
+    """
+    def __init__(self, cameras, workers=facial_recognition.RECOGNITION_WORKERS, loop=False, show_messages=False):
+        self.cameras = []
+        for stream, (camera_id, source) in enumerate(cameras.items()):
+            camera = OptimizedFaceRecognition(status_callback=self.status_callback(camera_id),
+                                              camera_id=camera_id, sources=[source], stream=stream)
+            camera.loop = loop
+            camera.show_messages = show_messages
+            self.cameras.append(camera)
+        self.workers = workers
+        self.pool = None
+        self.writer = None
+        self.metrics_exporter = None
+        self.door_lock = threading.Lock()
+        self.door_open = False
+
+    def status_callback(self, camera_id):
+        return lambda message: print(f"[INFO] [{camera_id}] {message}")
+
+    def start(self):
+        """Start the shared pool, writer and exporter, then every camera; return the number running"""
+        try:
+            init_runtime()
+        except RuntimeError as e:
+            print(f"[ERROR] {e}")
+            return 0
+
+        # Any recognizer works as the pool target: recognition only depends on the frame and its meta
+        self.pool = RecognitionPool(self.cameras[0].recognize_frame, self.workers,
+                                    facial_recognition.FRAME_SLOT_BYTES, warmup=warm_up,
+                                    streams=len(self.cameras))
+        self.pool.start()
+        self.writer = CheckinWriter(facial_recognition.CHECKIN_FILE, image_root=facial_recognition.IMG_FOLDER)
+        self.writer.start()
+
+        running = 0
+        for camera in self.cameras:
+            camera.share(self.pool, self.writer, self.set_door)
+            if camera.start():
+                running += 1
+            else:
+                print(f"[ERROR] Camera {camera.camera_id} did not start")
+
+        self.metrics_exporter = MetricsExporter()
+        self.metrics_exporter.start()
+        print(f"[INFO] {running}/{len(self.cameras)} cameras running on {self.pool.workers} shared workers")
+        return running
+
+    def set_door(self, camera, authorized):
+        """Keep the door open while any camera sees an authorized face"""
+        with self.door_lock:
+            door_open = any(c.door_open for c in self.cameras)
+            if door_open == self.door_open:
+                return
+            self.door_open = door_open
+            gpio_toggles.inc()
+            if facial_recognition.gpio_available:
+                if door_open:
+                    facial_recognition.output.on()
+                else:
+                    facial_recognition.output.off()
+
+    def running(self):
+        return any(camera.running for camera in self.cameras)
+
+    def report(self):
+        """Print throughput and latency per camera"""
+        for camera in self.cameras:
+            metrics = camera.metrics
+            latency = metrics["latency"]
+            print(f"[INFO] [{camera.camera_id}] {camera.fps:5.1f} fps, "
+                  f"{metrics['submitted'].get():.0f} submitted, {metrics['recognitions'].get():.0f} recognized, "
+                  f"latency p50 {format_ms(latency.quantile(0.5))}, p95 {format_ms(latency.quantile(0.95))}, "
+                  f"{metrics['checkins'].get():.0f} check-ins")
+
+    def stop(self):
+        """Stop every camera, then the shared pool, writer and exporter"""
+        for camera in self.cameras:
+            camera.stop()
+        if self.pool:
+            self.pool.stop()
+            self.pool = None
+        if self.writer:
+            self.writer.stop()
+            stats = self.writer.stats()
+            print(f"[INFO] Writer: {stats['rows_written']} rows, {stats['images_written']} images, "
+                  f"{stats['dropped']} dropped")
+            self.writer = None
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+
+def format_ms(seconds):
+    """Latency in ms, or "-" for a camera with no results yet"""
+    return "-" if seconds is None else f"{seconds * 1000:.0f} ms"
+
+def parse_cameras(items):
+    """Turn NAME=SOURCE arguments into an ordered camera dict"""
+    cameras = {}
+    for item in items:
+        camera_id, separator, source = item.partition("=")
+        if not separator or not camera_id or not source:
+            raise argparse.ArgumentTypeError(f"Expected NAME=SOURCE, got '{item}'")
+        cameras[camera_id] = source
+    return cameras
+
+def main():
+    parser = argparse.ArgumentParser(description="Run check-in for several cameras with one shared recognition pool")
+    parser.add_argument("--camera", action="append", metavar="NAME=SOURCE",
+                        help="camera id and URL, device index or video file (repeat per camera)")
+    parser.add_argument("--workers", type=int, default=facial_recognition.RECOGNITION_WORKERS)
+    parser.add_argument("--loop", action="store_true", help="restart video files when they end")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--popups", action="store_true", help="show check-in message boxes")
+    args = parser.parse_args()
+    cameras = parse_cameras(args.camera) if args.camera else CAMERAS
+
+    checkin = MultiCameraCheckin(cameras, args.workers, args.loop, args.popups)
+    if not checkin.start():
+        checkin.stop()
+        return
+    start_time = time.time()
+    next_report = start_time + STATUS_INTERVAL
+    try:
+        try:
+            while checkin.running():
+                if args.duration and time.time() - start_time >= args.duration:
+                    break
+                if time.time() >= next_report:
+                    checkin.report()
+                    next_report += STATUS_INTERVAL
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            pass
+        checkin.report()
+    finally:
+        checkin.stop()  # Flush the writer and release the pool's shared memory even after an error
+
+if __name__ == "__main__":
+    main()
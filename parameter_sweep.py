@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import argparse
+import itertools
+import cv2
+import numpy as np
+from imutils import paths
+import facial_recognition
+from benchmark_resolution import reference_encodings
+
+# Configuration
+DATASET_DIR = "dataset"     # Labeled stills: dataset/<name>/<image>
+CLIPS_DIR = "clips"         # Recorded clips: clips/<name>/<video> or clips/<name>.mp4 ("unknown" = not enrolled)
+MAX_CLIP_FRAMES = 300       # Frames read from each clip
+CAMERA_FPS = 30             # Frame rate the CPU budget and time-to-recognize refer to
+CPU_BUDGET = 1.0            # CPU cores available for recognition
+MAX_FALSE_ACCEPT = 0.01     # Highest false-accept rate a recommended config may have
+REPORT_FILE = "sweep_report.json"
+
+# Parameter grid. Detector, detection scale, upsampling and encoding model need a pass over the
+# data each; skip rate, face limit and tolerance are evaluated on the recorded results.
+GRID = {
+    "DETECTOR": ["hog", "haar"],
+    "cv_scaler": [4, 6, 8],
+    "DETECT_UPSAMPLE": [0, 1],
+    "ENCODING_MODEL": ["small", "large"],
+    "SKIP_FRAMES": [1, 2, 3, 5],
+    "MAX_FACES": [1, 3],
+    "RECOGNITION_TOLERANCE": [0.45, 0.5, 0.55, 0.6],
+}
+PASS_PARAMETERS = ["DETECTOR", "cv_scaler", "DETECT_UPSAMPLE", "ENCODING_MODEL"]
+
+def load_clips(clips_dir, max_frames=MAX_CLIP_FRAMES):
+    """Return (name, fps, frames) for every video under clips/<name>/ or named clips/<name>.<ext>"""
+    clips = []
+    if not os.path.isdir(clips_dir):
+        return clips
+    videos = []
+    for entry in sorted(os.listdir(clips_dir)):
+        path = os.path.join(clips_dir, entry)
+        if os.path.isdir(path):
+            videos.extend((entry, os.path.join(path, filename)) for filename in sorted(os.listdir(path)))
+        else:
+            videos.append((os.path.splitext(entry)[0], path))
+    for name, video in videos:
+        cap = cv2.VideoCapture(video)
+        fps = cap.get(cv2.CAP_PROP_FPS) or CAMERA_FPS
+        frames = []
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if frames:
+            clips.append((name, fps, frames))
+    return clips
+
+def analyze_frame(recognizer, frame, model):
+    """Detect and encode every face of a frame with the current module settings
+
+    Returns the detection cost in ms and a list of (encode ms, encoding) per face, in the
+    order recognize_faces would process them.
+    """
+    face_recognition = facial_recognition.load_face_models()
+    encode_scale = facial_recognition.ENCODE_SCALE
+    t0 = time.perf_counter()
+    small = frame if encode_scale == 1 else cv2.resize(frame, (0, 0), fx=1/encode_scale, fy=1/encode_scale)
+    rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    boxes = recognizer.detect_faces(rgb, max(1, facial_recognition.cv_scaler // encode_scale))
+    detect_ms = (time.perf_counter() - t0) * 1000
+
+    faces = []
+    for box in boxes:
+        t0 = time.perf_counter()
+        encoding = face_recognition.face_encodings(rgb, [box], model=model)[0]
+        faces.append(((time.perf_counter() - t0) * 1000, encoding))
+    return detect_ms, faces
+
+def nearest(encoding, references, names, exclude=None):
+    """Distance and name of the closest reference, skipping rows where exclude is True"""
+    distances = np.linalg.norm(references - encoding, axis=1)
+    if exclude is not None:
+        distances = np.where(exclude, np.inf, distances)
+    best = int(np.argmin(distances))
+    return float(distances[best]), names[best]
+
+def record_pass(recognizer, stills, still_names, references, clips):
+    """Run one detection/encoding configuration over all data and keep per-face match distances"""
+    model = facial_recognition.ENCODING_MODEL
+    ref_names = [still_names[i] for i in range(len(still_names)) if references[i] is not None]
+    ref_rows = [i for i in range(len(still_names)) if references[i] is not None]
+    ref_matrix = np.array([references[i] for i in ref_rows]) if ref_rows else np.empty((0, 128))
+    ref_people = np.array(ref_names)
+
+    still_results = []
+    for i, (image, name) in enumerate(zip(stills, still_names)):
+        detect_ms, faces = analyze_frame(recognizer, image, model)
+        same_image = np.array([row == i for row in ref_rows], dtype=bool)
+        same_person = ref_people == name
+        entries = []
+        for encode_ms, encoding in faces:
+            # Leave-one-out identification, and an impostor test without the person's own references
+            distance, match = nearest(encoding, ref_matrix, ref_names, same_image) if len(ref_rows) > 1 else (np.inf, None)
+            impostor_distance, _ = nearest(encoding, ref_matrix, ref_names, same_person) if (~same_person).any() else (np.inf, None)
+            entries.append((encode_ms, distance, match, impostor_distance))
+        still_results.append((name, detect_ms, entries))
+
+    clip_results = []
+    for name, fps, frames in clips:
+        frame_results = []
+        for frame in frames:
+            detect_ms, faces = analyze_frame(recognizer, frame, model)
+            entries = []
+            for encode_ms, encoding in faces:
+                distance, match = nearest(encoding, ref_matrix, ref_names) if len(ref_rows) else (np.inf, None)
+                entries.append((encode_ms, distance, match))
+            frame_results.append((detect_ms, entries))
+        clip_results.append((name, fps, frame_results))
+    return still_results, clip_results
+
+def evaluate(still_results, clip_results, skip, max_faces, tolerance, fps=CAMERA_FPS):
+    """Metrics of one full configuration from the recorded pass results"""
+    costs = []
+    recognized = 0
+    false_accepts = 0
+    impostor_trials = 0
+    for name, detect_ms, entries in still_results:
+        entries = entries[:max_faces]
+        costs.append(detect_ms + sum(entry[0] for entry in entries))
+        if any(distance <= tolerance and match == name for _, distance, match, _ in entries):
+            recognized += 1
+        impostor_trials += 1
+        if any(impostor_distance <= tolerance for _, _, _, impostor_distance in entries):
+            false_accepts += 1
+
+    times = []
+    missed_clips = 0
+    for name, clip_fps, frame_results in clip_results:
+        first = None
+        for index, (detect_ms, entries) in enumerate(frame_results):
+            if index % skip:
+                continue  # Skipped frames cost nothing
+            entries = entries[:max_faces]
+            cost = detect_ms + sum(entry[0] for entry in entries)
+            costs.append(cost)
+            accepted = [match for _, distance, match in entries if distance <= tolerance]
+            if name.lower() == "unknown":
+                impostor_trials += 1
+                false_accepts += bool(accepted)
+            elif first is None and name in accepted:
+                first = index / clip_fps + cost / 1000
+        if name.lower() != "unknown":
+            if first is None:
+                missed_clips += 1
+            else:
+                times.append(first)
+
+    frame_ms = float(np.mean(costs)) if costs else 0.0
+    return {
+        "frame_ms": frame_ms,
+        "cpu_cores": frame_ms / skip * fps / 1000,
+        "recognition_rate": recognized / len(still_results) if still_results else None,
+        "false_accept_rate": false_accepts / impostor_trials if impostor_trials else 0.0,
+        "time_to_recognize": float(np.mean(times)) if times else None,
+        "clips_missed": missed_clips,
+    }
+
+def dominates(a, b):
+    """True if result a is at least as good as b on every objective and better on one"""
+    keys = [("cpu_cores", -1), ("recognition_rate", 1), ("false_accept_rate", -1), ("time_to_recognize", -1)]
+    better = False
+    for key, sign in keys:
+        va, vb = a["metrics"][key], b["metrics"][key]
+        if va is None or vb is None:
+            continue
+        if sign * (va - vb) < 0:
+            return False
+        if sign * (va - vb) > 0:
+            better = True
+    return better
+
+def pareto_front(results):
+    return [r for r in results if not any(dominates(other, r) for other in results if other is not r)]
+
+def recommend(results, budget=CPU_BUDGET, max_false_accept=MAX_FALSE_ACCEPT):
+    """Best recognition within the CPU budget and false-accept limit, then fastest to recognize"""
+    allowed = [r for r in results
+               if r["metrics"]["cpu_cores"] <= budget and r["metrics"]["false_accept_rate"] <= max_false_accept]
+    if not allowed:
+        return None
+    return max(allowed, key=lambda r: (r["metrics"]["recognition_rate"] or 0,
+                                       -(r["metrics"]["time_to_recognize"] or float("inf")),
+                                       -r["metrics"]["cpu_cores"]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep recognition parameters for accuracy versus speed")
+    parser.add_argument("--dataset", default=DATASET_DIR)
+    parser.add_argument("--clips", default=CLIPS_DIR, help="folder of clips/<name>/<video>")
+    parser.add_argument("--budget", type=float, default=CPU_BUDGET, help="CPU cores available for recognition")
+    parser.add_argument("--fps", type=float, default=CAMERA_FPS, help="camera frame rate")
+    parser.add_argument("--max-false-accept", type=float, default=MAX_FALSE_ACCEPT)
+    parser.add_argument("--output", default=REPORT_FILE)
+    args = parser.parse_args()
+
+    image_paths = sorted(paths.list_images(args.dataset))
+    if not image_paths:
+        print(f"[ERROR] No images found in {args.dataset}")
+        return
+    still_names = [image_path.split(os.path.sep)[-2] for image_path in image_paths]
+    stills = [cv2.imread(image_path) for image_path in image_paths]
+    clips = load_clips(args.clips)
+    print(f"[INFO] {len(stills)} stills, {len(clips)} clips")
+    references = {}  # Encoding model -> full-resolution reference encodings
+
+    recognizer = facial_recognition.OptimizedFaceRecognition()
+    results = []
+    pass_values = [GRID[name] for name in PASS_PARAMETERS]
+    for values in itertools.product(*pass_values):
+        for name, value in zip(PASS_PARAMETERS, values):
+            setattr(facial_recognition, name, value)
+        print(f"[INFO] Pass {dict(zip(PASS_PARAMETERS, values))}")
+        # Queries are only comparable with references encoded by the same model
+        model = facial_recognition.ENCODING_MODEL
+        if model not in references:
+            print(f"[INFO] Encoding references at full resolution with the {model} model...")
+            references[model] = reference_encodings(image_paths, model)
+        still_results, clip_results = record_pass(recognizer, stills, still_names, references[model], clips)
+        for skip, max_faces, tolerance in itertools.product(
+                GRID["SKIP_FRAMES"], GRID["MAX_FACES"], GRID["RECOGNITION_TOLERANCE"]):
+            config = dict(zip(PASS_PARAMETERS, values))
+            config.update({"SKIP_FRAMES": skip, "MAX_FACES": max_faces, "RECOGNITION_TOLERANCE": tolerance})
+            metrics = evaluate(still_results, clip_results, skip, max_faces, tolerance, args.fps)
+            results.append({"config": config, "metrics": metrics})
+
+    front = pareto_front(results)
+    front.sort(key=lambda r: r["metrics"]["cpu_cores"])
+    best = recommend(results, args.budget, args.max_false_accept)
+
+    print(f"[INFO] {len(results)} configurations, {len(front)} on the Pareto front")
+    for r in front:
+        m = r["metrics"]
+        ttr = f"{m['time_to_recognize']:.2f}s" if m["time_to_recognize"] is not None else "-"
+        print(f"  {m['cpu_cores']:5.2f} cores  {m['frame_ms']:6.1f} ms/frame  "
+              f"recognized {m['recognition_rate'] or 0:6.1%}  false accept {m['false_accept_rate']:6.2%}  "
+              f"time to recognize {ttr:>6}  {r['config']}")
+    if best:
+        print(f"[INFO] Recommended for {args.budget:g} cores: {best['config']}")
+    else:
+        print(f"[INFO] No configuration fits {args.budget:g} cores with false accepts <= {args.max_false_accept:.1%}")
+
+    with open(args.output, "w") as f:
+        json.dump({"budget_cores": args.budget, "fps": args.fps, "max_false_accept": args.max_false_accept,
+                   "recommended": best, "pareto_front": front, "results": results}, f, indent=1)
+    print(f"[INFO] Report saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import queue
+import threading
+import multiprocessing
+from frame_ring import FrameRing
+
+def recognition_worker(process_frame, ring, result_queue, warmup=None, ready=None):
+    """Worker loop: lease the newest frame, process it in place and return (stream, seq, result) until the ring closes"""
+    # Results are tiny; never keep the process alive at shutdown just to flush them
+    result_queue.cancel_join_thread()
+    if warmup:
+        try:
+            warmup()
+        except Exception as e:
+            print(f"[ERROR] Recognition worker warm-up failed: {e}")
+    if ready is not None:
+        with ready.get_lock():
+            ready.value += 1
+    while True:
+        lease = ring.get()
+        if lease is None:
+            break
+        seq = lease.seq
+        stream = lease.stream
+        try:
+            result = process_frame(lease.frame, **lease.meta)
+        except Exception as e:
+            print(f"[ERROR] Recognition worker failed on frame {seq}: {e}")
+            continue
+        finally:
+            ring.release(lease)
+        result_queue.put((stream, seq, result))
+
+class RecognitionPool:
+    """Pool of recognition processes that handle frames in parallel and tag results with frame sequence numbers
+
+    Frames travel through a shared-memory FrameRing (latest frame wins), results come back
+    through a small queue. With streams > 1, several cameras share the workers: each
+    publishes to its own stream, frames are served in turn and results are ordered and
+    collected per stream.
+    """
+    def __init__(self, process_frame, workers, slot_bytes, warmup=None, streams=1):
+        self.process_frame = process_frame
+        self.warmup = warmup  # Run once in each worker before it takes frames (model loading)
+        self.ready = multiprocessing.Value("i", 0)
+        self.workers = max(1, workers)
+        self.streams = max(1, streams)
+        # One slot per worker plus one being written and one waiting per stream
+        self.ring = FrameRing(self.workers + 2 * self.streams, slot_bytes, self.streams)
+        self.result_queue = multiprocessing.Queue()
+        self.processes = []
+        self.results_lock = threading.Lock()  # Each stream's consumer thread collects results
+        self.unclaimed = [[] for _ in range(self.streams)]  # Results read for other streams
+        self.last_seq = [0] * self.streams  # Newest result handed to each stream's consumer
+        self.stale = 0      # Results discarded because a newer frame was already applied
+
+    @property
+    def dropped(self):
+        """Frames replaced by a newer one before any worker took them"""
+        return self.ring.dropped.value
+
+    def pending(self):
+        """Frames waiting in the ring for a free worker"""
+        return self.ring.pending()
+
+    def ready_workers(self):
+        """Workers that finished warming up and wait for frames"""
+        return self.ready.value
+
+    def start(self):
+        """Start the worker processes"""
+        for i in range(self.workers):
+            process = multiprocessing.Process(
+                target=recognition_worker,
+                args=(self.process_frame, self.ring, self.result_queue, self.warmup, self.ready),
+                name=f"recognition-worker-{i}",
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+    def acquire(self, shape, stream=0):
+        """Reserve a shared-memory frame buffer to write into; return (slot, view) or None"""
+        return self.ring.acquire(shape, stream)
+
+    def publish(self, slot, seq, shape, meta=None, stream=0):
+        """Hand a frame written into an acquired buffer to the workers"""
+        self.ring.publish(slot, seq, shape, meta, stream)
+
+    def submit(self, seq, frame, meta=None, stream=0):
+        """Copy a frame into the ring for recognition; return False if no slot is free"""
+        return self.ring.put(seq, frame, meta, stream)
+
+    def get_results(self, stream=0):
+        """Return all newly finished results of a stream in frame order, discarding stale ones"""
+        with self.results_lock:
+            while True:
+                try:
+                    result_stream, seq, result = self.result_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self.unclaimed[result_stream].append((seq, result))
+            results, self.unclaimed[stream] = self.unclaimed[stream], []
+
+            fresh = []
+            for seq, result in sorted(results, key=lambda item: item[0]):
+                if seq <= self.last_seq[stream]:
+                    self.stale += 1
+                    continue
+                self.last_seq[stream] = seq
+                fresh.append((seq, result))
+            return fresh
+
+    def stop(self, timeout=1):
+        """Close the ring so idle workers exit, wait for them and free the shared memory"""
+        self.ring.close()
+        for process in self.processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                print(f"[ERROR] {process.name} did not exit, terminating")
+                process.terminate()
+                process.join(timeout=timeout)
+        self.processes = []
+        self.ring.destroy()
@@ -0,0 +1,62 @@
+import numpy as np
+from gallery import ENCODING_DIM, save_gallery
+from gallery_service import LiveGallery, add_person, remove_person, replace_gallery
+
+TOLERANCE = 0.5
+
+def person_encodings(seed, count=3):
+    """A few encodings close to one random centre, standing in for one person's photos"""
+    rng = np.random.default_rng(seed)
+    centre = rng.normal(size=ENCODING_DIM).astype(np.float32)
+    return centre + rng.normal(scale=0.01, size=(count, ENCODING_DIM)).astype(np.float32)
+
+def train(people, gallery_path, journal_path):
+    encodings = np.concatenate([people[name] for name in people])
+    row_names = [name for name in people for _ in people[name]]
+    return replace_gallery(encodings, row_names, gallery_path, journal_path)
+
+def test_retrain_restores_removed_person(tmp_path):
+    gallery_path = str(tmp_path / "encodings.gallery")
+    journal_path = str(tmp_path / "encodings.journal")
+    people = {"p0": person_encodings(0), "p1": person_encodings(1)}
+    save_gallery(np.concatenate(list(people.values())), ["p0"] * 3 + ["p1"] * 3, gallery_path)
+
+    remove_person("p1", journal_path)
+    assert LiveGallery(gallery_path, journal_path).match(people["p1"][:1], TOLERANCE) == ["Unknown"]
+
+    # Retraining on a dataset that still holds p1 brings p1 back
+    assert train(people, gallery_path, journal_path)
+    live = LiveGallery(gallery_path, journal_path)
+    assert live.match(people["p1"][:1], TOLERANCE) == ["p1"]
+    assert live.match(people["p0"][:1], TOLERANCE) == ["p0"]
+
+def test_retrain_does_not_duplicate_enrolled_person(tmp_path):
+    gallery_path = str(tmp_path / "encodings.gallery")
+    journal_path = str(tmp_path / "encodings.journal")
+    people = {"p0": person_encodings(0)}
+    assert not train(people, gallery_path, journal_path)
+
+    people["p2"] = person_encodings(2)
+    add_person("p2", people["p2"], journal_path)
+    assert len(LiveGallery(gallery_path, journal_path)) == 6
+
+    # p2's images are now in the dataset, so the retrained gallery holds them once
+    train(people, gallery_path, journal_path)
+    live = LiveGallery(gallery_path, journal_path)
+    assert len(live) == 6
+    assert live.match(people["p2"][:1], TOLERANCE) == ["p2"]
+
+def test_running_recognizer_follows_retrain(tmp_path):
+    gallery_path = str(tmp_path / "encodings.gallery")
+    journal_path = str(tmp_path / "encodings.journal")
+    people = {"p0": person_encodings(0), "p1": person_encodings(1)}
+    train(people, gallery_path, journal_path)
+    live = LiveGallery(gallery_path, journal_path, check_interval=0)
+
+    remove_person("p1", journal_path)
+    live.refresh()
+    assert live.match(people["p1"][:1], TOLERANCE) == ["Unknown"]
+
+    train(people, gallery_path, journal_path)
+    live.refresh()
+    assert live.match(people["p1"][:1], TOLERANCE) == ["p1"]
@@ -0,0 +1,83 @@
+import threading
+import cv2
+from PIL import Image, ImageTk
+
+# Configuration
+DISPLAY_FPS = 15                      # Upper limit of video redraws per second
+DISPLAY_INTERPOLATION = cv2.INTER_LINEAR
+
+class VideoRenderer:
+    """Draw the newest frame into a Tk label from the Tk main loop at a capped rate
+
+    The processing thread only hands over a reference to its latest frame. Rendering is
+    scheduled with `after` on the main thread, so Tk is never called from another thread.
+    Frames are resized with OpenCV straight to the label size and pasted into one reused
+    PhotoImage; a new PhotoImage is only created when the label is resized.
+    """
+    def __init__(self, label, fps=DISPLAY_FPS):
+        self.label = label
+        self.interval_ms = max(1, int(1000 / fps))
+        self.lock = threading.Lock()
+        self.frame = None
+        self.photo = None
+        self.photo_size = None
+        self.after_id = None
+
+        # Statistics
+        self.published = 0
+        self.rendered = 0
+
+    def start(self):
+        """Start the render loop; must be called from the Tk main thread"""
+        if self.after_id is None:
+            self.after_id = self.label.after(self.interval_ms, self.render)
+
+    def stop(self):
+        """Stop the render loop and forget the last frame; must be called from the Tk main thread"""
+        if self.after_id is not None:
+            self.label.after_cancel(self.after_id)
+            self.after_id = None
+        with self.lock:
+            self.frame = None
+
+    def publish(self, frame):
+        """Hand over the newest BGR frame (any thread); an unrendered older frame is replaced"""
+        with self.lock:
+            self.frame = frame
+            self.published += 1
+
+    def render(self):
+        """Draw the newest frame, if there is one, and schedule the next redraw"""
+        self.after_id = self.label.after(self.interval_ms, self.render)
+        with self.lock:
+            frame, self.frame = self.frame, None
+        if frame is None:
+            return
+
+        try:
+            width = self.label.winfo_width()
+            height = self.label.winfo_height()
+            if width <= 1 or height <= 1:
+                height, width = frame.shape[:2]
+            if (width, height) != (frame.shape[1], frame.shape[0]):
+                frame = cv2.resize(frame, (width, height), interpolation=DISPLAY_INTERPOLATION)
+            image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+            if self.photo is None or self.photo_size != (width, height):
+                self.photo = ImageTk.PhotoImage(image=image)
+                self.photo_size = (width, height)
+                self.label.config(image=self.photo)
+            else:
+                # Update the pixels of the image already shown by the label
+                self.photo.paste(image)
+            self.rendered += 1
+        except Exception as e:
+            print(f"Display update error: {e}")
+
+    def stats(self):
+        """Frames handed over and frames actually drawn"""
+        return {
+            "published": self.published,
+            "rendered": self.rendered,
+            "skipped": self.published - self.rendered,
+        }